@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'expenses', 
 ]
 
@@ -50,6 +52,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-request query count and timing (Server-Timing header and the
+# /stats/requests/ endpoint); outermost so it covers the whole stack.
+# Requests slower than DJANGO_SLOW_REQUEST_MS are logged with their queries.
+EXPENSES_REQUEST_STATS = os.environ.get('EXPENSES_REQUEST_STATS') == '1'
+EXPENSES_SLOW_REQUEST_MS = float(os.environ['DJANGO_SLOW_REQUEST_MS']) if os.environ.get('DJANGO_SLOW_REQUEST_MS') else None
+
+if EXPENSES_REQUEST_STATS:
+    MIDDLEWARE.insert(0, 'expenses.middleware.RequestStatsMiddleware')
+
 ROOT_URLCONF = 'expense_tracker.urls'
 
 TEMPLATES = [
@@ -74,13 +85,71 @@ WSGI_APPLICATION = 'expense_tracker.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# SQLite by default. Set DJANGO_DB_ENGINE=postgresql (needs psycopg) and the
+# DJANGO_DB_* variables below for production. Connections persist for
+# DJANGO_DB_CONN_MAX_AGE seconds instead of being reopened per request; put
+# PgBouncer in front for pooling across processes and set
+# DJANGO_DB_PGBOUNCER=1 when it runs in transaction mode.
+
+DB_CONN_MAX_AGE = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', '60'))
+
+if os.environ.get('DJANGO_DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'expense_tracker'),
+            'USER': os.environ.get('DJANGO_DB_USER', ''),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', ''),
+            'PORT': os.environ.get('DJANGO_DB_PORT', ''),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # Server-side cursors (QuerySet.iterator) do not survive
+            # transaction pooling
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DJANGO_DB_PGBOUNCER') == '1',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# synchronous=NORMAL and a busy timeout for SQLite connections, applied by
+# expenses.signals on connection_created; concurrent writers then wait
+# instead of failing with "database is locked". DJANGO_SQLITE_TUNING=0 keeps
+# the SQLite defaults.
+SQLITE_TUNING = os.environ.get('DJANGO_SQLITE_TUNING', '1') == '1'
+SQLITE_BUSY_TIMEOUT_MS = 5000
+# WAL journal, so readers no longer block the writer. Off by default: the
+# mode is stored in the database file itself (and adds -wal/-shm files next
+# to it), which would rewrite the checked-in db.sqlite3. DJANGO_SQLITE_WAL=1
+# enables it for deployments with their own database file.
+SQLITE_WAL = SQLITE_TUNING and os.environ.get('DJANGO_SQLITE_WAL', '0') == '1'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory is per process; set DJANGO_CACHE_DIR to share the dashboard
+# cache (and its invalidations) between several workers on one host.
+
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'expense-tracker',
+        }
     }
-}
 
 
 # Password validation
@@ -119,12 +188,33 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files and generated artifacts (background import/export jobs)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Serve the read-heavy pages from expenses.async_views; enabled by
+# expense_tracker.asgi so ASGI workers avoid the sync thread hop
+EXPENSES_ASYNC_VIEWS = os.environ.get('EXPENSES_ASYNC_VIEWS') == '1'
+
+
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 LOGIN_URL = '/login/'
+
+# JSON API under /api/; sync clients authenticate with HTTP Basic, the
+# browsable API with the login session
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
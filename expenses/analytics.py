@@ -0,0 +1,151 @@
+# expenses/analytics.py
+# Trends and forecasts for the reports page, computed with NumPy from one
+# grouped query of daily per-category totals. NumPy is imported on first use
+# so it stays out of worker boot.
+import calendar
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+
+from .budgets import budget_level
+from .cache import ANALYTICS_HISTORY_MONTHS
+from .models import Budget, Expense
+from .rollups import add_months, month_start
+
+# Days shown in the rolling average chart
+ROLLING_CHART_DAYS = 90
+# Trailing days whose average spend drives the forecast and category run rates
+TRAILING_DAYS = 30
+
+
+def _daily_matrix(user, start, end):
+    """(categories, array) where array[c, d] is spent in category c on start + d days"""
+    import numpy as np
+
+    rows = list(
+        Expense.objects.filter(user=user, date__gte=start, date__lte=end)
+        .values_list('category', 'date')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    categories = sorted({category for category, _, _ in rows})
+    index = {category: position for position, category in enumerate(categories)}
+    matrix = np.zeros((len(categories), (end - start).days + 1))
+    if rows:
+        np.add.at(
+            matrix,
+            (
+                np.fromiter((index[category] for category, _, _ in rows), dtype=np.intp, count=len(rows)),
+                np.fromiter(((day - start).days for _, day, _ in rows), dtype=np.intp, count=len(rows)),
+            ),
+            np.fromiter((total for _, _, total in rows), dtype=float, count=len(rows)),
+        )
+    return categories, matrix
+
+
+def _rolling_mean(values, window):
+    """Mean of the last window values at each position (fewer at the start)"""
+    import numpy as np
+
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    positions = np.arange(1, len(values) + 1)
+    lower = np.maximum(positions - window, 0)
+    return (sums[positions] - sums[lower]) / (positions - lower)
+
+
+def _money(values):
+    import numpy as np
+
+    return np.round(values, 2).tolist()
+
+
+def month_analytics(user, day):
+    """Trends up to day and a forecast for the rest of day's month.
+
+    Per-day totals for ANALYTICS_HISTORY_MONTHS full months plus the current
+    month to date come from a single query; monthly totals, month-over-month
+    changes, rolling averages, per-category run rates and the forecast are
+    array operations on them. The forecast adds the trailing TRAILING_DAYS
+    daily average for every remaining day of the month to the month-to-date
+    total.
+    """
+    import numpy as np
+
+    month = month_start(day)
+    start = add_months(month, -ANALYTICS_HISTORY_MONTHS)
+    days_in_month = calendar.monthrange(day.year, day.month)[1]
+    days_elapsed = day.day
+    days_remaining = days_in_month - days_elapsed
+
+    categories, matrix = _daily_matrix(user, start, day)
+    budgets = dict(Budget.objects.filter(user=user, month=month).values_list('category', 'amount'))
+    daily = matrix.sum(axis=0)
+
+    # Monthly totals via the day offsets at which each month begins
+    months = [add_months(start, offset) for offset in range(ANALYTICS_HISTORY_MONTHS + 1)]
+    offsets = np.array([(first - start).days for first in months])
+    monthly = np.add.reduceat(daily, offsets)
+    change = np.diff(monthly)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = np.where(monthly[:-1] > 0, change / monthly[:-1] * 100, np.nan)
+
+    trailing = daily[-TRAILING_DAYS:].mean()
+    month_to_date = daily[offsets[-1]:].sum()
+    forecast = month_to_date + trailing * days_remaining
+
+    category_mtd = matrix[:, offsets[-1]:].sum(axis=1)
+    category_trailing = matrix[:, -TRAILING_DAYS:].mean(axis=1)
+    category_forecast = category_mtd + category_trailing * days_remaining
+
+    rolling_days = min(ROLLING_CHART_DAYS, len(daily))
+    chart_days = [day - timedelta(days=offset) for offset in range(rolling_days - 1, -1, -1)]
+
+    overall_budget = budgets.get('Overall')
+    return {
+        'as_of': day,
+        'month': month,
+        'days_elapsed': days_elapsed,
+        'days_in_month': days_in_month,
+        'month_to_date': round(float(month_to_date), 2),
+        'daily_average': round(float(trailing), 2),
+        'forecast': round(float(forecast), 2),
+        'budget': overall_budget,
+        'forecast_variance': round(float(overall_budget) - float(forecast), 2) if overall_budget is not None else None,
+        'forecast_level': budget_level(overall_budget, forecast),
+        'monthly': [
+            {'month': first, 'total': total, 'change': delta, 'change_pct': pct}
+            for first, total, delta, pct in zip(
+                months,
+                _money(monthly),
+                [None] + _money(change),
+                [None] + [None if np.isnan(pct) else round(float(pct), 1) for pct in change_pct],
+            )
+        ],
+        'categories': [
+            {
+                'category': category,
+                'month_to_date': mtd,
+                'run_rate': rate,
+                'forecast': projected,
+                'budget': budgets.get(category),
+                'forecast_level': budget_level(budgets.get(category), projected),
+            }
+            for category, mtd, rate, projected in zip(
+                categories,
+                _money(category_mtd),
+                # Average monthly spend at the trailing daily rate
+                _money(category_trailing * days_in_month),
+                _money(category_forecast),
+            )
+        ],
+        'rolling_labels': json.dumps([chart_day.isoformat() for chart_day in chart_days]),
+        'rolling_7': json.dumps(_money(_rolling_mean(daily, 7)[-rolling_days:])),
+        'rolling_30': json.dumps(_money(_rolling_mean(daily, 30)[-rolling_days:])),
+    }
+
+
+async def amonth_analytics(user, day):
+    # The arithmetic is CPU bound; run it with its two queries off the loop
+    return await sync_to_async(month_analytics)(user, day)
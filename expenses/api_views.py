@@ -0,0 +1,291 @@
+# expenses/api_views.py
+# JSON API for sync clients: CRUD plus bulk create/delete for expenses,
+# budgets and recurring templates, keyset cursor pagination, ?fields=
+# selection, ETag based conditional GETs, date bucketed aggregates and
+# full-text search and recurring charge projections.
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .budgets import check_batch_budget_alerts, copy_budgets, upsert_budgets
+from .models import Budget, Expense, RecurringExpense
+from .pagination import keyset_page, parse_page_size
+from .projections import project_recurring
+from .reports import bucket_totals
+from .search import search_expenses
+from .serializers import (
+    MAX_BULK_SIZE,
+    AggregateQuerySerializer,
+    BudgetSerializer,
+    BulkDeleteSerializer,
+    CopyBudgetsSerializer,
+    ExpenseSerializer,
+    ProjectionQuerySerializer,
+    RecurringExpenseSerializer,
+    SearchQuerySerializer,
+    selected_fields,
+)
+from .signals import coalesce_expense_signals, expenses_bulk_created, invalidate_cached_months
+
+BULK_BATCH_SIZE = 500
+
+
+class KeysetCursorPagination(BasePagination):
+    """Cursor pagination over the view's (date_field, id) keyset"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = keyset_page(
+            queryset,
+            request.query_params.get('cursor'),
+            parse_page_size(request.query_params.get('page_size')),
+            view.date_field,
+        )
+        return self.page.items
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.page.next_cursor:
+            next_url = replace_query_param(self.request.build_absolute_uri(), 'cursor', self.page.next_cursor)
+        return Response({'next': next_url, 'next_cursor': self.page.next_cursor, 'results': data})
+
+
+class ConditionalGetMixin:
+    """ETag successful GETs by their body and answer If-None-Match with 304"""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+            return response
+        response.render()
+        set_response_etag(response)
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+class UserOwnedViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """CRUD over the requesting user's rows plus bulk create and delete"""
+    pagination_class = KeysetCursorPagination
+    # Newest-first ordering and cursor position for list pages
+    date_field = None
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(user=self.request.user)
+        selected = selected_fields(self.request)
+        if selected:
+            # Load only the columns the response will contain
+            columns = {field.name for field in queryset.model._meta.concrete_fields} & selected
+            queryset = queryset.only('id', self.date_field, *columns)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def bulk_create_objects(self, rows):
+        """Insert validated rows; returns (objects, extra response data)"""
+        objects = self.queryset.model.objects.bulk_create(
+            [self.queryset.model(user=self.request.user, **row) for row in rows],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        return objects, {}
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=MAX_BULK_SIZE)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            objects, extra = self.bulk_create_objects(serializer.validated_data)
+        return Response(
+            {'results': self.get_serializer(objects, many=True).data, **extra},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # One rollup update per touched bucket instead of one per row
+        with transaction.atomic(), coalesce_expense_signals():
+            _, deleted = self.get_queryset().filter(id__in=serializer.validated_data['ids']).delete()
+        return Response({'deleted': deleted.get(self.queryset.model._meta.label, 0)})
+
+
+def _query_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Enter a date as YYYY-MM-DD.'})
+
+
+class ExpenseViewSet(UserOwnedViewSet):
+    """Expenses, filterable with ?start=, ?end= (inclusive) and ?category="""
+    queryset = Expense.objects.all()
+    serializer_class = ExpenseSerializer
+    date_field = 'date'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        start = _query_date(self.request, 'start')
+        end = _query_date(self.request, 'end')
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+
+    def bulk_create_objects(self, rows):
+        expenses, _ = super().bulk_create_objects(rows)
+        expenses_bulk_created.send(sender=Expense, expenses=expenses)
+        return expenses, {'alerts': check_batch_budget_alerts(self.request.user, expenses)}
+
+    @action(detail=False, methods=['get'])
+    def aggregate(self, request):
+        """Totals per ?granularity= bucket (and optionally ?group_by=) over ?start=..?end="""
+        params = AggregateQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        group_by = query.get('group_by') or None
+
+        buckets = bucket_totals(request.user, query['start'], query['end'], query['granularity'], group_by)
+        return Response({
+            'start': query['start'],
+            'end': query['end'],
+            'granularity': query['granularity'],
+            'group_by': group_by,
+            'total': f"{sum((bucket['total'] for bucket in buckets), Decimal('0')):.2f}",
+            'count': sum(bucket['count'] for bucket in buckets),
+            'buckets': [
+                {**bucket, 'period': bucket['period'].isoformat(), 'total': f"{bucket['total']:.2f}"}
+                for bucket in buckets
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked matches of every word of ?q= in title or notes, filterable like the list"""
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        results = search_expenses(
+            request.user, query['q'], query.get('category'), query.get('start'), query.get('end'), query['limit'],
+        )
+        return Response({'results': self.get_serializer(results, many=True).data})
+
+
+def _check_budget_conflicts(user, keys, exclude_id=None, allow_existing=False):
+    """Reject (month, category) keys repeated in keys or, unless allow_existing, already budgeted"""
+    conflicts = {key for key, count in Counter(keys).items() if count > 1}
+    if not allow_existing:
+        existing = Budget.objects.filter(
+            user=user, month__in={month for month, _ in keys}, category__in={category for _, category in keys}
+        ).exclude(pk=exclude_id).values_list('month', 'category')
+        conflicts |= set(keys) & set(existing)
+    conflicts = sorted(conflicts)
+    if conflicts:
+        raise ValidationError({
+            'non_field_errors': [
+                f"Only one {category} budget is allowed for {month.strftime('%B %Y')}."
+                for month, category in conflicts
+            ]
+        })
+
+
+class BudgetViewSet(UserOwnedViewSet):
+    queryset = Budget.objects.all()
+    serializer_class = BudgetSerializer
+    date_field = 'month'
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        _check_budget_conflicts(self.request.user, [(data['month'], data['category'])])
+        serializer.save(user=self.request.user, is_overall=data['category'] == 'Overall')
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        month = serializer.validated_data.get('month', instance.month)
+        category = serializer.validated_data.get('category', instance.category)
+        _check_budget_conflicts(self.request.user, [(month, category)], exclude_id=instance.pk)
+        serializer.save(is_overall=category == 'Overall')
+
+    def bulk_create_objects(self, rows):
+        user = self.request.user
+        _check_budget_conflicts(user, [(row['month'], row['category']) for row in rows])
+        budgets = Budget.objects.bulk_create(
+            [Budget(user=user, is_overall=row['category'] == 'Overall', **row) for row in rows],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        # bulk_create skips post_save, which is what normally invalidates
+        invalidate_cached_months(user.pk, {budget.month for budget in budgets})
+        return budgets, {}
+
+    @action(detail=False, methods=['post'])
+    def upsert(self, request):
+        """Create or update a month x category grid of budgets in one transaction"""
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=MAX_BULK_SIZE)
+        serializer.is_valid(raise_exception=True)
+        keys = [(row['month'], row['category']) for row in serializer.validated_data]
+        _check_budget_conflicts(request.user, keys, allow_existing=True)
+        written = upsert_budgets(
+            request.user, [(row['month'], row['category'], row['amount']) for row in serializer.validated_data]
+        )
+        # Upserted rows come back without ids on some backends; read them back
+        written_keys = set(keys)
+        candidates = self.get_queryset().filter(
+            month__in={month for month, _ in keys}, category__in={category for _, category in keys}
+        ).order_by('month', 'category')
+        budgets = [budget for budget in candidates if (budget.month, budget.category) in written_keys]
+        return Response({'written': written, 'results': self.get_serializer(budgets, many=True).data})
+
+    @action(detail=False, methods=['post'])
+    def copy(self, request):
+        """Copy the budgets of one month to another, keeping existing ones unless overwrite is set"""
+        params = CopyBudgetsSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        written = copy_budgets(data['source'], data['target'], users=[request.user], overwrite=data['overwrite'])
+        return Response({'written': written})
+
+
+class RecurringExpenseViewSet(UserOwnedViewSet):
+    queryset = RecurringExpense.objects.all()
+    serializer_class = RecurringExpenseSerializer
+    date_field = 'start_date'
+
+    @action(detail=False, methods=['get'])
+    def projection(self, request):
+        """Projected charges of the active templates per day and month over ?start=..?end="""
+        params = ProjectionQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        projection = project_recurring(request.user, params.validated_data['start'], params.validated_data['end'])
+        return Response({
+            'start': projection['start'],
+            'end': projection['end'],
+            'total': f"{projection['total']:.2f}",
+            'months': [
+                {
+                    'month': row['month'],
+                    'total': f"{row['total']:.2f}",
+                    'categories': {category: f'{total:.2f}' for category, total in row['categories']},
+                    'budget': f"{row['budget']:.2f}" if row['budget'] is not None else None,
+                    'remaining': f"{row['remaining']:.2f}" if row['remaining'] is not None else None,
+                    'level': row['level'],
+                }
+                for row in projection['months']
+            ],
+            'days': [{'date': day, 'total': f'{total:.2f}'} for day, total in projection['days']],
+        })
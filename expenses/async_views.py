@@ -0,0 +1,91 @@
+# expenses/async_views.py
+# Native async versions of the read-heavy views, routed instead of their
+# expenses/views.py counterparts when EXPENSES_ASYNC_VIEWS is enabled (the
+# default under expense_tracker.asgi).
+import asyncio
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import render
+
+from .analytics import amonth_analytics
+from .budgets import aget_budget_status, month_bounds
+from .cache import aget_dashboard_status, aget_month_analytics, aget_report_payload
+from .models import Expense
+from .pagination import akeyset_page
+from .reports import areport_payload
+
+
+def async_login_required(view):
+    """login_required for coroutine views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # request.user is a lazy object backed by a session lookup; resolve it
+        # off the event loop
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _expense_list(queryset):
+    return [expense async for expense in queryset.order_by('-date', '-id')]
+
+
+@async_login_required
+async def home_view(request):
+    cursor = request.GET.get('cursor')
+    today = date.today()
+
+    page, budget_status = await asyncio.gather(
+        akeyset_page(Expense.objects.filter(user=request.user), cursor),
+        aget_dashboard_status(request.user, today, lambda: aget_budget_status(request.user, today)),
+    )
+
+    return render(request, 'expenses/home.html', {
+        'expenses': page.items,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
+        'monthly_total': budget_status.overall_total,
+        'current_month': datetime.now().strftime('%B %Y'),
+        'overall_budget': budget_status.overall_budget,
+        'budget_remaining': budget_status.overall_remaining,
+        'budget_alert': budget_status.overall_level,
+    })
+
+
+@async_login_required
+async def expenses_day_view(request):
+    today = date.today()
+    expenses = await _expense_list(Expense.objects.filter(user=request.user, date=today))
+    return render(request, 'expenses/expenses_day.html', {'expenses': expenses, 'filter_date': today})
+
+
+@async_login_required
+async def expenses_week_view(request):
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    expenses = await _expense_list(Expense.objects.filter(user=request.user, date__range=[week_start, week_end]))
+    return render(request, 'expenses/expenses_week.html', {'expenses': expenses, 'week_start': week_start, 'week_end': week_end})
+
+
+@async_login_required
+async def expenses_month_view(request):
+    today = date.today()
+    start, end = month_bounds(today)
+    expenses = await _expense_list(Expense.objects.filter(user=request.user, date__gte=start, date__lt=end))
+    return render(request, 'expenses/expenses_month.html', {'expenses': expenses, 'current_month': today.strftime('%B %Y')})
+
+
+@async_login_required
+async def monthly_reports_view(request):
+    today = date.today()
+    context, analytics = await asyncio.gather(
+        aget_report_payload(request.user, lambda: areport_payload(request.user)),
+        aget_month_analytics(request.user, today, lambda: amonth_analytics(request.user, today)),
+    )
+    return render(request, 'expenses/monthly_reports.html', {**context, 'analytics': analytics})
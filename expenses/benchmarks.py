@@ -0,0 +1,46 @@
+# expenses/benchmarks.py
+# Shared plumbing for the benchmark management commands: each measured
+# configuration runs in its own interpreter (settings are read at import
+# time) and reports back one JSON line.
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+
+def summarize(label, latencies, elapsed, failures):
+    """Throughput and latency percentiles for one benchmark run"""
+    ordered = sorted(latencies)
+    return {
+        'label': label,
+        'operations': len(latencies),
+        'failures': failures,
+        'seconds': round(elapsed, 3),
+        'per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(statistics.median(ordered) * 1000, 2) if ordered else None,
+        'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 2) if ordered else None,
+    }
+
+
+def run_in_subprocess(command, args, env):
+    """Run manage.py command with extra environment and return its last output line as JSON"""
+    completed = subprocess.run(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), command, *args],
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode:
+        raise CommandError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def format_summary(result, unit):
+    return (
+        f"{result['label']}: {result['per_second']} {unit}/s, "
+        f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, {result['failures']} failures"
+    )
@@ -0,0 +1,264 @@
+# expenses/budgets.py
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Budget, MonthlyCategoryTotal
+from .rollups import month_start
+from .signals import invalidate_cached_months
+
+# Share of a budget at which spending triggers a warning
+WARNING_THRESHOLD = Decimal('0.9')
+
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+# Inserts copy_budgets tries before giving up when concurrent writes keep conflicting
+COPY_ATTEMPTS = 3
+
+
+def month_bounds(day):
+    """First day of day's month and first day of the following month"""
+    start = month_start(day)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def budget_level(budget, total):
+    """'exceeded', 'warning' or None for spending against a budget amount"""
+    if budget is None:
+        return None
+    if total >= budget:
+        return 'exceeded'
+    if total >= budget * WARNING_THRESHOLD:
+        return 'warning'
+    return None
+
+
+class BudgetStatus(namedtuple('BudgetStatus', [
+    'month', 'category', 'overall_budget', 'overall_total', 'category_budget', 'category_total',
+])):
+    """Budgets and spending for one user and month; budgets are None when unset"""
+    __slots__ = ()
+
+    @property
+    def overall_remaining(self):
+        if self.overall_budget is None:
+            return None
+        return self.overall_budget - self.overall_total
+
+    @property
+    def overall_level(self):
+        return budget_level(self.overall_budget, self.overall_total)
+
+
+def _budget_amount(month, category):
+    budgets = Budget.objects.filter(user=OuterRef('pk'), month=month, category=category)
+    return Subquery(budgets.values('amount')[:1], output_field=AMOUNT_FIELD)
+
+
+def _month_spending(month, category=None):
+    # Summed from the month's rollup rows, one per category, not raw expenses
+    buckets = MonthlyCategoryTotal.objects.filter(user=OuterRef('pk'), month=month)
+    if category is not None:
+        buckets = buckets.filter(category=category)
+    total = buckets.order_by().values('user').annotate(total=Sum('total')).values('total')[:1]
+    return Coalesce(Subquery(total, output_field=AMOUNT_FIELD), Value(Decimal('0')), output_field=AMOUNT_FIELD)
+
+
+def _budget_status_query(user, day, category):
+    month = month_start(day)
+    annotations = {
+        'overall_budget': _budget_amount(month, 'Overall'),
+        'overall_total': _month_spending(month),
+    }
+    if category:
+        annotations['category_budget'] = _budget_amount(month, category)
+        annotations['category_total'] = _month_spending(month, category)
+    return User.objects.filter(pk=user.pk).values(**annotations)
+
+
+def _budget_status(row, day, category):
+    return BudgetStatus(
+        month=month_start(day),
+        category=category,
+        overall_budget=row['overall_budget'],
+        overall_total=row['overall_total'],
+        category_budget=row.get('category_budget'),
+        category_total=row.get('category_total', Decimal('0')),
+    )
+
+
+def get_budget_status(user, day, category=None):
+    """Overall and (optionally) category budget and spending for day's month.
+
+    Both budgets and both month totals, read from the MonthlyCategoryTotal
+    rollup, are fetched in a single query.
+    """
+    if category == 'Overall':
+        category = None
+    row = _budget_status_query(user, day, category).get()
+    return _budget_status(row, day, category)
+
+
+async def aget_budget_status(user, day, category=None):
+    if category == 'Overall':
+        category = None
+    row = await _budget_status_query(user, day, category).aget()
+    return _budget_status(row, day, category)
+
+
+def _category_alert(category, budget, new_total):
+    level = budget_level(budget, new_total)
+    if level == 'exceeded':
+        return f"⚠️ You've exceeded your {category} budget of ${budget:.2f}!"
+    if level == 'warning':
+        return f"⚠️ You're close to your {category} budget limit. Remaining: ${budget - new_total:.2f}"
+    return None
+
+
+def _overall_alert(budget, new_total):
+    level = budget_level(budget, new_total)
+    if level == 'exceeded':
+        return f"🚨 You've exceeded your overall monthly budget of ${budget:.2f}!"
+    if level == 'warning':
+        return f"⚠️ You're approaching your overall budget limit. Remaining: ${budget - new_total:.2f}"
+    return None
+
+
+def budget_alerts(status, pending_amount=0):
+    """Alert messages for a status, counting pending_amount as already spent"""
+    alerts = []
+    if status.category_budget is not None:
+        alerts.append(_category_alert(status.category, status.category_budget, status.category_total + pending_amount))
+    if status.overall_budget is not None:
+        alerts.append(_overall_alert(status.overall_budget, status.overall_total + pending_amount))
+    return [alert for alert in alerts if alert]
+
+
+def check_budget_alerts(user, category, amount, expense_date):
+    """Check if adding this expense triggers any budget alerts"""
+    return budget_alerts(get_budget_status(user, expense_date, category), amount)
+
+
+def check_batch_budget_alerts(user, expenses):
+    """Alerts for every budget touched by a batch of already saved expenses.
+
+    Runs two queries however many rows or months the batch covers: one for
+    the budgets of the touched months and one for their rollup totals.
+    """
+    touched = defaultdict(set)
+    for expense in expenses:
+        touched[month_start(expense.date)].add(expense.category)
+    if not touched:
+        return []
+
+    budgets = [
+        (month, category, amount)
+        for month, category, amount in Budget.objects.filter(user=user, month__in=list(touched)).values_list(
+            'month', 'category', 'amount'
+        )
+        if category == 'Overall' or category in touched[month]
+    ]
+    if not budgets:
+        return []
+
+    totals = defaultdict(Decimal)
+    spending = MonthlyCategoryTotal.objects.filter(user=user, month__in=list(touched)).values_list(
+        'month', 'category', 'total'
+    )
+    for month, category, total in spending:
+        totals[(month, category)] += total
+        totals[(month, 'Overall')] += total
+
+    alerts = []
+    for month, category, amount in sorted(budgets):
+        total = totals[(month, category)]
+        if category == 'Overall':
+            alert = _overall_alert(amount, total)
+        else:
+            alert = _category_alert(category, amount, total)
+        if alert:
+            alerts.append(f"{month.strftime('%B %Y')}: {alert}")
+    return alerts
+
+
+def upsert_budgets(user, rows, batch_size=500):
+    """Create or update the user's budgets from (month, category, amount) rows.
+
+    The whole grid is written in one transaction with INSERT ... ON CONFLICT
+    DO UPDATE on the (user, category, month) key, so existing budgets get the
+    new amount instead of failing the insert. Months must be month starts and
+    each (month, category) may appear once. Returns the number of rows written.
+    """
+    budgets = [
+        Budget(user=user, month=month, category=category, amount=amount, is_overall=category == 'Overall')
+        for month, category, amount in rows
+    ]
+    with transaction.atomic():
+        Budget.objects.bulk_create(
+            budgets,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'category', 'month'],
+            update_fields=['amount', 'is_overall'],
+        )
+        # bulk_create skips post_save, which is what normally invalidates
+        invalidate_cached_months(user.pk, {budget.month for budget in budgets})
+    return len(budgets)
+
+
+def _uncopied(rows, target):
+    """The (user_id, category, ...) rows without a budget in target yet"""
+    existing = set(target.values_list('user_id', 'category'))
+    return [row for row in rows if row[:2] not in existing]
+
+
+def copy_budgets(source_month, target_month, users=None, overwrite=False, batch_size=500):
+    """Copy every budget of source_month to target_month, for users or everyone.
+
+    Budgets that already exist in target_month are kept unless overwrite is
+    set. Without overwrite the missing budgets are inserted in a savepoint;
+    if one is created concurrently in the meantime, the unique constraint
+    rolls it back and the copy is retried without it. Returns the number
+    of budgets written: those created, plus those replaced when overwriting.
+    """
+    month = month_start(target_month)
+    source = Budget.objects.filter(month=month_start(source_month))
+    target = Budget.objects.filter(month=month)
+    if users is not None:
+        source = source.filter(user__in=users)
+        target = target.filter(user__in=users)
+
+    rows = list(source.values_list('user_id', 'category', 'amount', 'is_overall'))
+    for attempt in range(COPY_ATTEMPTS):
+        if not overwrite:
+            rows = _uncopied(rows, target)
+        if not rows:
+            return 0
+        budgets = [
+            Budget(user_id=user_id, category=category, amount=amount, is_overall=is_overall, month=month)
+            for user_id, category, amount, is_overall in rows
+        ]
+        try:
+            with transaction.atomic():
+                if overwrite:
+                    Budget.objects.bulk_create(
+                        budgets,
+                        batch_size=batch_size,
+                        update_conflicts=True,
+                        unique_fields=['user', 'category', 'month'],
+                        update_fields=['amount'],
+                    )
+                else:
+                    Budget.objects.bulk_create(budgets, batch_size=batch_size)
+                for user_id in {budget.user_id for budget in budgets}:
+                    invalidate_cached_months(user_id, [month])
+        except IntegrityError:
+            # A budget created concurrently wins when not overwriting
+            if overwrite or attempt == COPY_ATTEMPTS - 1:
+                raise
+            continue
+        return len(budgets)
@@ -0,0 +1,132 @@
+# expenses/cache.py
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+
+from .rollups import add_months, month_start
+
+# Entries are invalidated on writes; the timeout only bounds staleness if a
+# write path is missed
+CACHE_TIMEOUT = 15 * 60
+
+# Full months of history behind each month's analytics; a write invalidates
+# the analytics of the months that follow it within this window
+ANALYTICS_HISTORY_MONTHS = 24
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def dashboard_key(user_id, month):
+    return f"expenses:dashboard:{user_id}:{month.strftime('%Y-%m')}"
+
+
+def reports_key(user_id):
+    return f"expenses:reports:{user_id}"
+
+
+def analytics_key(user_id, month):
+    return f"expenses:analytics:{user_id}:{month.strftime('%Y-%m')}"
+
+
+def _record(name, outcome):
+    with _stats_lock:
+        _stats[f"{name}_{outcome}"] += 1
+
+
+def get_or_compute(name, key, compute, timeout=CACHE_TIMEOUT):
+    """Return the cached value for key, computing and storing it on a miss"""
+    value = cache.get(key)
+    if value is None:
+        _record(name, 'misses')
+        value = compute()
+        cache.set(key, value, timeout)
+    else:
+        _record(name, 'hits')
+    return value
+
+
+async def aget_or_compute(name, key, compute, timeout=CACHE_TIMEOUT):
+    """Async get_or_compute; compute is a coroutine function"""
+    value = await cache.aget(key)
+    if value is None:
+        _record(name, 'misses')
+        value = await compute()
+        await cache.aset(key, value, timeout)
+    else:
+        _record(name, 'hits')
+    return value
+
+
+def get_dashboard_status(user, day, compute):
+    return get_or_compute('dashboard', dashboard_key(user.pk, month_start(day)), compute)
+
+
+def get_report_payload(user, compute):
+    return get_or_compute('reports', reports_key(user.pk), compute)
+
+
+def get_month_analytics(user, day, compute):
+    """Analytics of day's month as of day; a value cached on an earlier day
+    of the month counts as a miss since its forecast is out of date"""
+    key = analytics_key(user.pk, month_start(day))
+    value = cache.get(key)
+    if value is None or value['as_of'] != day:
+        _record('analytics', 'misses')
+        value = compute()
+        cache.set(key, value, CACHE_TIMEOUT)
+    else:
+        _record('analytics', 'hits')
+    return value
+
+
+async def aget_month_analytics(user, day, compute):
+    key = analytics_key(user.pk, month_start(day))
+    value = await cache.aget(key)
+    if value is None or value['as_of'] != day:
+        _record('analytics', 'misses')
+        value = await compute()
+        await cache.aset(key, value, CACHE_TIMEOUT)
+    else:
+        _record('analytics', 'hits')
+    return value
+
+
+async def aget_dashboard_status(user, day, compute):
+    return await aget_or_compute('dashboard', dashboard_key(user.pk, month_start(day)), compute)
+
+
+async def aget_report_payload(user, compute):
+    return await aget_or_compute('reports', reports_key(user.pk), compute)
+
+
+def invalidate_user_months(user_id, months):
+    """Drop cached dashboard entries for the given months, the user's reports
+    and the analytics of every month whose history includes one of them"""
+    months = {month_start(month) for month in months}
+    keys = {dashboard_key(user_id, month) for month in months}
+    keys.update(
+        analytics_key(user_id, add_months(month, offset))
+        for month in months
+        for offset in range(ANALYTICS_HISTORY_MONTHS + 1)
+    )
+    keys.add(reports_key(user_id))
+    cache.delete_many(list(keys))
+    _record('invalidations', 'total')
+
+
+def cache_stats():
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    for name in ('dashboard', 'reports', 'analytics'):
+        hits = stats.get(f"{name}_hits", 0)
+        misses = stats.get(f"{name}_misses", 0)
+        stats[f"{name}_hit_rate"] = round(hits / (hits + misses), 3) if hits + misses else None
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
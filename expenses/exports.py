@@ -0,0 +1,179 @@
+# expenses/exports.py
+import csv
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Expense
+
+EXPORT_HEADER = ['Date', 'Title', 'Amount', 'Category', 'Notes']
+EXPORT_FIELDS = ('date', 'title', 'amount', 'category', 'notes')
+
+# format -> (content type, download file name)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'expenses.csv'),
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'expenses.xlsx'),
+    'pdf': ('application/pdf', 'expenses.pdf'),
+}
+
+# Rows fetched from the database cursor per round trip
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into a single chunk of the streamed response body
+LINES_PER_WRITE = 500
+
+# Detail rows per PDF table; roughly one letter page
+PDF_ROWS_PER_TABLE = 40
+PDF_COLUMN_WIDTHS = [62, 150, 62, 74, 120]
+PDF_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), '#f0f0f0'),
+    ('TEXTCOLOR', (0, 0), (-1, 0), '#000000'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), '#ffffff'),
+    ('GRID', (0, 0), (-1, -1), 1, '#000000'),
+]
+
+
+class Echo:
+    """Pseudo-buffer that returns what is written instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(user, start_date=None, end_date=None):
+    """Expenses selected for export, newest first"""
+    expenses = Expense.objects.filter(user=user).order_by('-date')
+    if start_date:
+        expenses = expenses.filter(date__gte=start_date)
+    if end_date:
+        expenses = expenses.filter(date__lte=end_date)
+    return expenses
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows without instantiating Expense objects or caching the queryset"""
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for expense_date, title, amount, category, notes in rows:
+        yield [expense_date.strftime('%Y-%m-%d'), title, float(amount), category, notes or '']
+
+
+def iter_csv_chunks(rows):
+    """Yield the CSV document as text chunks of LINES_PER_WRITE rows each"""
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(EXPORT_HEADER)]
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= LINES_PER_WRITE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def write_csv(rows, fileobj):
+    """Write the CSV document to a binary file object"""
+    for chunk in iter_csv_chunks(rows):
+        fileobj.write(chunk.encode('utf-8'))
+
+
+def write_excel(rows, fileobj):
+    """Write export rows as an .xlsx workbook.
+
+    Uses openpyxl's write-only mode, which spools each appended row to disk
+    instead of keeping a cell model of the whole sheet, so memory stays
+    proportional to one database chunk.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Expenses')
+    sheet.append(list(EXPORT_FIELDS))
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def export_summary(queryset):
+    """Monthly and category totals for the export selection, aggregated in the database"""
+    expenses = queryset.order_by()
+    monthly = (
+        expenses.annotate(month=TruncMonth('date'))
+        .values_list('month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by('month')
+    )
+    categories = expenses.values_list('category').annotate(total=Sum('amount'), count=Count('id')).order_by('-total')
+    return {'monthly': list(monthly), 'categories': list(categories)}
+
+
+def _clip(text, length):
+    return text if len(text) <= length else text[:length - 1] + '…'
+
+
+def write_pdf(rows, fileobj, summary=None):
+    """Write export rows as a paged PDF report.
+
+    The detail table is emitted as fixed-size tables of PDF_ROWS_PER_TABLE
+    rows with the header repeated on every page, so reportlab lays out
+    many small tables instead of one that must be split across the whole
+    history. An optional summary page precedes the detail.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    doc = SimpleDocTemplate(fileobj, pagesize=letter, title='Expense Report')
+    styles = getSampleStyleSheet()
+    table_style = TableStyle(PDF_TABLE_STYLE)
+
+    # Title
+    title = Paragraph("Expense Report", styles['Title'])
+    elements = [title]
+
+    if summary is not None:
+        elements.append(Paragraph("Monthly Totals", styles['Heading2']))
+        monthly = [['Month', 'Expenses', 'Total']] + [
+            [month.strftime('%B %Y'), count, f"${total:.2f}"] for month, total, count in summary['monthly']
+        ]
+        elements.append(Table(monthly, colWidths=[160, 80, 100], repeatRows=1, style=table_style))
+        elements.append(Spacer(1, 18))
+        elements.append(Paragraph("Category Totals", styles['Heading2']))
+        categories = [['Category', 'Expenses', 'Total']] + [
+            [category, count, f"${total:.2f}"] for category, total, count in summary['categories']
+        ]
+        elements.append(Table(categories, colWidths=[160, 80, 100], repeatRows=1, style=table_style))
+        elements.append(PageBreak())
+
+    # Detail tables in fixed-size chunks
+    chunk = []
+    for expense_date, title, amount, category, notes in rows:
+        chunk.append([expense_date, _clip(title, 34), f"${amount:.2f}", category, _clip(notes, 30)])
+        if len(chunk) == PDF_ROWS_PER_TABLE:
+            elements.append(Table([EXPORT_HEADER] + chunk, colWidths=PDF_COLUMN_WIDTHS, repeatRows=1, style=table_style))
+            chunk = []
+    if chunk or len(elements) == 1:
+        elements.append(Table([EXPORT_HEADER] + chunk, colWidths=PDF_COLUMN_WIDTHS, repeatRows=1, style=table_style))
+
+    doc.build(elements)
+
+
+def write_export(export_format, queryset, fileobj, rows=None):
+    """Write the selected expenses to fileobj in export_format.
+
+    rows defaults to iter_export_rows(queryset); callers may pass a wrapped
+    iterator (e.g. to report progress).
+    """
+    if rows is None:
+        rows = iter_export_rows(queryset)
+    if export_format == 'csv':
+        write_csv(rows, fileobj)
+    elif export_format == 'excel':
+        write_excel(rows, fileobj)
+    elif export_format == 'pdf':
+        write_pdf(rows, fileobj, summary=export_summary(queryset))
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
@@ -51,6 +51,51 @@ class BudgetForm(forms.ModelForm):
             ]
 
 
+class BudgetGridForm(forms.Form):
+    """One optional amount per month and budget category.
+
+    Cells left blank are not written, so clearing a cell does not delete
+    an existing budget.
+    """
+
+    def __init__(self, *args, months, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.months = months
+        self.categories = [choice for choice, _ in Budget.CATEGORY_CHOICES]
+        for month in months:
+            for category in self.categories:
+                self.fields[self.field_name(month, category)] = forms.DecimalField(
+                    required=False,
+                    min_value=0,
+                    max_digits=10,
+                    decimal_places=2,
+                    label=f"{category} {month.strftime('%B %Y')}",
+                    widget=forms.NumberInput(attrs={'step': '0.01', 'min': '0'}),
+                )
+
+    @staticmethod
+    def field_name(month, category):
+        return f"amount_{month.strftime('%Y_%m')}_{category}"
+
+    def grid(self):
+        """(month, [bound field per category]) rows for the template"""
+        return [
+            (month, [self[self.field_name(month, category)] for category in self.categories])
+            for month in self.months
+        ]
+
+    def changed_cells(self):
+        """(month, category, amount) for every filled in cell that changed"""
+        changed = set(self.changed_data)
+        return [
+            (month, category, self.cleaned_data[self.field_name(month, category)])
+            for month in self.months
+            for category in self.categories
+            if self.field_name(month, category) in changed
+            and self.cleaned_data[self.field_name(month, category)] is not None
+        ]
+
+
 class RecurringExpenseForm(forms.ModelForm):
     start_date = forms.DateField(
         widget=forms.DateInput(attrs={'type': 'date'}),
@@ -72,3 +117,23 @@ class RecurringExpenseForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Optional notes...'}),
         }
 
+
+
+class ExpenseSearchForm(forms.Form):
+    q = forms.CharField(max_length=200, label='Search', widget=forms.TextInput(attrs={
+        'type': 'search', 'placeholder': 'Words from the title or notes...', 'autofocus': True,
+    }))
+    category = forms.ChoiceField(
+        choices=[('', 'All categories')] + Expense.CATEGORY_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    start = forms.DateField(required=False, label='From', widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, label='To', widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and end < start:
+            self.add_error('end', 'End date cannot be before the start date.')
+        return cleaned_data
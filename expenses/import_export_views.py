@@ -0,0 +1,128 @@
+# expenses/import_export_views.py
+# Import/export views live apart from expenses/views.py so that pandas,
+# reportlab and openpyxl are only loaded by the first request that needs them.
+import tempfile
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from .budgets import check_batch_budget_alerts
+from .exports import EXPORT_FORMATS, export_queryset, iter_csv_chunks, iter_export_rows, write_export
+from .imports import UnsupportedFileFormat, import_expenses, read_expense_file
+from .jobs import submit_export, submit_import
+from .models import Job
+
+
+@login_required
+def export_expenses_view(request):
+    """Export expenses to CSV, Excel, or PDF"""
+    export_format = request.GET.get('format', 'csv')
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+
+    if export_format not in EXPORT_FORMATS:
+        return redirect('home')
+
+    if request.GET.get('background'):
+        job = submit_export(request.user, export_format, start_date, end_date)
+        return job_accepted_response(request, job)
+
+    expenses = export_queryset(request.user, start_date, end_date)
+    content_type, filename = EXPORT_FORMATS[export_format]
+
+    if export_format == 'csv':
+        # Stream rows straight from the database cursor so memory stays flat
+        response = StreamingHttpResponse(iter_csv_chunks(iter_export_rows(expenses)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # Excel and PDF documents are assembled in a temp file and streamed back from disk
+    spool = tempfile.TemporaryFile()
+    write_export(export_format, expenses, spool)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=content_type)
+
+
+@login_required
+def import_expenses_view(request):
+    """Import expenses from CSV or Excel file"""
+    if request.method == 'POST' and request.FILES.get('file'):
+        if request.POST.get('background'):
+            job = submit_import(request.user, request.FILES['file'])
+            return job_accepted_response(request, job)
+
+        try:
+            df = read_expense_file(request.FILES['file'])
+            result = import_expenses(request.user, df)
+            imported_count, errors = result.imported_count, result.errors
+
+            if imported_count > 0:
+                messages.success(request, f'Successfully imported {imported_count} expenses.')
+
+            # Budgets are evaluated once for the whole batch
+            for alert in check_batch_budget_alerts(request.user, result.expenses):
+                messages.warning(request, alert)
+
+            if errors:
+                for error in errors[:5]:  # Show first 5 errors
+                    messages.warning(request, error)
+                if len(errors) > 5:
+                    messages.warning(request, f'... and {len(errors) - 5} more errors.')
+
+        except UnsupportedFileFormat as e:
+            messages.error(request, str(e))
+        except Exception as e:
+            messages.error(request, f'Error processing file: {str(e)}')
+
+    return redirect('import_export')
+
+
+@login_required
+def import_export_view(request):
+    """View for import/export page"""
+    return render(request, 'expenses/import_export.html')
+
+
+def job_accepted_response(request, job):
+    """Answer a background submission with the job id (JSON) or a redirect to the jobs page"""
+    status_url = reverse('job_status', args=[job.id])
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'job_id': job.id, 'status': job.status, 'status_url': status_url}, status=202)
+    messages.success(request, f'{job.get_kind_display()} queued as job #{job.id}.')
+    return redirect('jobs')
+
+
+@login_required
+def jobs_view(request):
+    jobs = Job.objects.filter(user=request.user).order_by('-created_at')[:50]
+    return render(request, 'expenses/jobs.html', {'jobs': jobs})
+
+
+@login_required
+def job_status_view(request, job_id):
+    """Report a job's progress as JSON for polling clients"""
+    job = get_object_or_404(Job, id=job_id, user=request.user)
+    data = {
+        'job_id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'percent_complete': job.percent_complete,
+        'result': job.result,
+        'error': job.error,
+        'download_url': None,
+    }
+    if job.kind == 'export' and job.status == 'done':
+        data['download_url'] = reverse('job_download', args=[job.id])
+    return JsonResponse(data)
+
+
+@login_required
+def job_download_view(request, job_id):
+    job = get_object_or_404(Job, id=job_id, user=request.user, kind='export', status='done')
+    content_type, filename = EXPORT_FORMATS[job.params.get('format', 'csv')]
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename, content_type=content_type)
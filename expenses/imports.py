@@ -0,0 +1,142 @@
+# expenses/imports.py
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Expense
+from .signals import expenses_bulk_created
+
+IMPORT_COLUMNS = ['date', 'title', 'amount', 'category', 'notes']
+REQUIRED_COLUMNS = ['date', 'title', 'amount']
+IMPORT_BATCH_SIZE = 1000
+
+VALID_CATEGORIES = [choice[0] for choice in Expense.CATEGORY_CHOICES]
+TITLE_MAX_LENGTH = Expense._meta.get_field('title').max_length
+# DecimalField(max_digits=10, decimal_places=2) holds at most 8 integer digits
+AMOUNT_LIMIT = 10 ** 8
+
+ImportResult = namedtuple('ImportResult', ['imported_count', 'errors', 'expenses'])
+
+
+class UnsupportedFileFormat(ValueError):
+    pass
+
+
+def read_expense_file(uploaded_file):
+    """Load an uploaded CSV or Excel file into a DataFrame"""
+    import pandas as pd
+
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    if file_extension == 'csv':
+        return pd.read_csv(uploaded_file)
+    if file_extension in ['xlsx', 'xls']:
+        return pd.read_excel(uploaded_file)
+    raise UnsupportedFileFormat('Unsupported file format. Please upload CSV or Excel file.')
+
+
+def normalize_columns(df):
+    """Return a frame with exactly IMPORT_COLUMNS as stripped strings.
+
+    Column names are matched case-insensitively and missing columns or
+    empty cells become ''.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    df = df.loc[:, ~df.columns.duplicated()]
+    df = df.reset_index(drop=True)
+
+    normalized = pd.DataFrame(index=df.index)
+    for column in IMPORT_COLUMNS:
+        if column in df.columns:
+            values = df[column]
+            normalized[column] = values.where(values.notna(), '').astype(str).str.strip()
+        else:
+            normalized[column] = ''
+    return normalized
+
+
+def parse_dates(values):
+    """Parse a column of date strings, NaT where a value is not a date.
+
+    Timezone-aware values keep the calendar date they were written with.
+    """
+    import pandas as pd
+
+    try:
+        return pd.to_datetime(values, errors='coerce', format='mixed')
+    except ValueError:
+        # Values with different UTC offsets (or aware next to naive ones)
+        # cannot share a column; parse them one by one instead
+        parsed = (pd.to_datetime(value, errors='coerce') for value in values)
+        return pd.Series([value.tz_localize(None) for value in parsed], index=values.index, dtype='datetime64[ns]')
+
+
+def validate_rows(df):
+    """Validate and convert a normalized frame column-wise.
+
+    Returns the frame of valid rows (with parsed date/amount/category
+    columns) and a list of per-row error messages numbered like the
+    spreadsheet rows (header is row 1).
+    """
+    import pandas as pd
+
+    row_numbers = df.index + 2
+    problems = pd.Series('', index=df.index)
+
+    missing = (df[REQUIRED_COLUMNS] == '').any(axis=1)
+    problems[missing] = 'Missing required fields (date, title, amount)'
+
+    dates = parse_dates(df['date'])
+    problems[(problems == '') & dates.isna()] = 'Invalid date format'
+
+    amounts = pd.to_numeric(df['amount'].str.replace('$', '', regex=False).str.replace(',', '', regex=False), errors='coerce')
+    problems[(problems == '') & amounts.isna()] = 'Invalid amount format'
+    problems[(problems == '') & (amounts.abs() >= AMOUNT_LIMIT)] = 'Amount out of range'
+
+    problems[(problems == '') & (df['title'].str.len() > TITLE_MAX_LENGTH)] = f'Title longer than {TITLE_MAX_LENGTH} characters'
+
+    invalid = problems != ''
+    errors = [f"Row {row}: {problem}" for row, problem in zip(row_numbers[invalid], problems[invalid])]
+
+    valid = df[~invalid].copy()
+    valid['date'] = dates[~invalid].dt.date
+    valid['amount'] = amounts[~invalid].round(2)
+    valid['category'] = valid['category'].where(valid['category'].isin(VALID_CATEGORIES), 'Other')
+    return valid, errors
+
+
+def build_expenses(user, valid):
+    """Turn validated rows into unsaved Expense instances"""
+    return [
+        Expense(
+            user=user,
+            date=expense_date,
+            title=title,
+            amount=Decimal(f"{amount:.2f}"),
+            category=category,
+            notes=notes or None,
+        )
+        for expense_date, title, amount, category, notes in zip(
+            valid['date'], valid['title'], valid['amount'], valid['category'], valid['notes']
+        )
+    ]
+
+
+def import_expenses(user, df, batch_size=IMPORT_BATCH_SIZE):
+    """Validate a DataFrame of expenses and insert the valid rows in bulk.
+
+    All batches are written inside one transaction, so an import either
+    lands completely or not at all.
+    """
+    valid, errors = validate_rows(normalize_columns(df))
+    expenses = build_expenses(user, valid)
+
+    with transaction.atomic():
+        for start in range(0, len(expenses), batch_size):
+            batch = Expense.objects.bulk_create(expenses[start:start + batch_size])
+            expenses_bulk_created.send(sender=Expense, expenses=batch)
+
+    return ImportResult(len(expenses), errors, expenses)
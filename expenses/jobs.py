@@ -0,0 +1,125 @@
+# expenses/jobs.py
+import logging
+import tempfile
+
+from django.core.files import File
+from django.utils import timezone
+
+from .budgets import check_batch_budget_alerts
+from .exports import EXPORT_FORMATS, export_queryset, iter_export_rows, write_export
+from .imports import import_expenses, read_expense_file
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Export progress is written back to the job every PROGRESS_EVERY rows
+PROGRESS_EVERY = 1000
+# Import error messages kept on the job for display
+MAX_STORED_ERRORS = 100
+
+
+def submit_import(user, uploaded_file):
+    """Queue an uploaded CSV/Excel file for import and return the job"""
+    job = Job(user=user, kind='import')
+    job.input_file.save(uploaded_file.name, uploaded_file, save=False)
+    job.save()
+    return job
+
+
+def submit_export(user, export_format, start_date=None, end_date=None):
+    """Queue an export of the user's expenses and return the job"""
+    return Job.objects.create(
+        user=user,
+        kind='export',
+        params={'format': export_format, 'start_date': start_date or None, 'end_date': end_date or None},
+    )
+
+
+def claim_next_job():
+    """Move the oldest pending job to running, or return None if the queue is empty"""
+    while True:
+        job = Job.objects.filter(status='pending').order_by('created_at', 'id').first()
+        if job is None:
+            return None
+
+        # Compare-and-set on status so two workers never run the same job
+        started_at = timezone.now()
+        if Job.objects.filter(pk=job.pk, status='pending').update(status='running', started_at=started_at):
+            job.status = 'running'
+            job.started_at = started_at
+            return job
+
+
+def run_job(job):
+    """Execute a claimed job, recording success or failure on it"""
+    try:
+        if job.kind == 'import':
+            _run_import(job)
+        elif job.kind == 'export':
+            _run_export(job)
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+    except Exception as e:
+        logger.exception("Job %s failed", job.pk)
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def _run_import(job):
+    with job.input_file.open('rb') as f:
+        df = read_expense_file(f)
+
+    job.total = len(df)
+    job.save(update_fields=['total'])
+
+    # The insert runs in one transaction, so progress is only reported once it commits
+    imported = import_expenses(job.user, df)
+
+    job.input_file.delete(save=False)
+    job.progress = job.total
+    job.result = {
+        'imported_count': imported.imported_count,
+        'error_count': len(imported.errors),
+        'errors': imported.errors[:MAX_STORED_ERRORS],
+        'alerts': check_batch_budget_alerts(job.user, imported.expenses),
+    }
+    _finish(job, ['input_file', 'progress', 'result'])
+
+
+def _run_export(job):
+    export_format = job.params.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    expenses = export_queryset(job.user, job.params.get('start_date'), job.params.get('end_date'))
+    job.total = expenses.count()
+    job.save(update_fields=['total'])
+
+    filename = EXPORT_FORMATS[export_format][1]
+    rows = _track_progress(job, iter_export_rows(expenses))
+    with tempfile.TemporaryFile() as tmp:
+        write_export(export_format, expenses, tmp, rows=rows)
+        tmp.seek(0)
+        job.result_file.save(filename, File(tmp), save=False)
+
+    job.progress = job.total
+    job.result = {'row_count': job.total}
+    _finish(job, ['result_file', 'progress', 'result'])
+
+
+def _track_progress(job, rows):
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % PROGRESS_EVERY == 0:
+            Job.objects.filter(pk=job.pk).update(progress=count)
+
+
+def _finish(job, update_fields):
+    job.status = 'done'
+    job.finished_at = timezone.now()
+    job.save(update_fields=update_fields + ['status', 'finished_at'])
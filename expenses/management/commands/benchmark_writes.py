@@ -0,0 +1,104 @@
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+
+from expenses.benchmarks import format_summary, run_in_subprocess, summarize
+from expenses.models import Expense
+
+BENCHMARK_USERNAME = '_benchmark_writes'
+CATEGORIES = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+
+# (label, environment) per measured configuration and database engine
+PROFILES = {
+    'sqlite': [
+        ('sqlite defaults, connection per request', {'DJANGO_SQLITE_TUNING': '0', 'DJANGO_DB_CONN_MAX_AGE': '0'}),
+        ('sqlite WAL, persistent connections', {
+            'DJANGO_SQLITE_TUNING': '1', 'DJANGO_SQLITE_WAL': '1', 'DJANGO_DB_CONN_MAX_AGE': '60',
+        }),
+    ],
+    'postgresql': [
+        ('postgresql, connection per request', {'DJANGO_DB_CONN_MAX_AGE': '0'}),
+        ('postgresql, persistent connections', {'DJANGO_DB_CONN_MAX_AGE': '60'}),
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent expense write throughput with and without the tuned database settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent writers (default 8)')
+        parser.add_argument('--writes', type=int, default=200, help='Expenses saved per writer (default 200)')
+        parser.add_argument('--worker', help=argparse.SUPPRESS)
+        parser.add_argument('--migrate', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        vendor = 'postgresql' if 'postgresql' in settings.DATABASES['default']['ENGINE'] else 'sqlite'
+        worker_args = ['--threads', str(options['threads']), '--writes', str(options['writes'])]
+        results = []
+        with tempfile.TemporaryDirectory() as scratch:
+            for index, (label, env) in enumerate(PROFILES[vendor]):
+                args = ['--worker', label, *worker_args]
+                if vendor == 'sqlite':
+                    # Fresh database file per profile; never the project database
+                    env = dict(env, DJANGO_DB_NAME=str(Path(scratch) / f'benchmark_{index}.sqlite3'))
+                    args.append('--migrate')
+                results.append(run_in_subprocess('benchmark_writes', args, env))
+
+        for result in results:
+            self.stdout.write(format_summary(result, 'writes'))
+        self.stdout.write(json.dumps(results))
+
+    def run_worker(self, options):
+        if options['migrate']:
+            call_command('migrate', verbosity=0, interactive=False)
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        connections.close_all()
+
+        def writer(index):
+            latencies, failures = [], 0
+            for n in range(options['writes']):
+                # Bracket each write like a request so CONN_MAX_AGE applies
+                close_old_connections()
+                start = time.perf_counter()
+                try:
+                    Expense.objects.create(
+                        user=user,
+                        title=f'Benchmark {index}-{n}',
+                        amount=n % 100 + 1,
+                        date=date.today() - timedelta(days=n % 90),
+                        category=CATEGORIES[n % len(CATEGORIES)],
+                    )
+                except OperationalError:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+                close_old_connections()
+            connections.close_all()
+            return latencies, failures
+
+        threads = max(1, options['threads'])
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                outcomes = list(pool.map(writer, range(threads)))
+            elapsed = time.perf_counter() - started
+        finally:
+            # Cascades to the benchmark expenses and their rollups
+            User.objects.filter(username=BENCHMARK_USERNAME).delete()
+
+        latencies = [latency for thread_latencies, _ in outcomes for latency in thread_latencies]
+        failures = sum(thread_failures for _, thread_failures in outcomes)
+        self.stdout.write(json.dumps(summarize(options['worker'], latencies, elapsed, failures)))
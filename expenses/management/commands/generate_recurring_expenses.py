@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.management.utils import add_user_argument, resolve_users
+from expenses.recurring import generate_recurring_expenses
+
+
+class Command(BaseCommand):
+    help = 'Generate expenses from active recurring templates, catching up on missed days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help='Last day to generate for (YYYY-MM-DD, default today)')
+        parser.add_argument('--start', type=date.fromisoformat, default=None,
+                            help='First day to generate for; by default each template resumes after its last_generated date')
+        add_user_argument(parser, 'generate for')
+
+    def handle(self, *args, **options):
+        end_date = options['date'] or date.today()
+        start_date = options['start']
+        if start_date and start_date > end_date:
+            raise CommandError('--start must not be after --date')
+
+        users = resolve_users(options)
+
+        generated_count = generate_recurring_expenses(end_date, start_date=start_date, users=users)
+        self.stdout.write(self.style.SUCCESS(f'Generated {generated_count} recurring expenses through {end_date}.'))
@@ -0,0 +1,48 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.synthetic import delete_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Create synthetic users with expenses, budgets and recurring templates for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1, help='Users to create (default 1)')
+        parser.add_argument('--years', type=int, default=3, help='Years of history per user (default 3)')
+        parser.add_argument('--per-day', type=int, default=10, help='Average expenses per day (default 10)')
+        parser.add_argument('--recurring', type=int, default=20, help='Recurring templates per user (default 20)')
+        parser.add_argument('--end', type=date.fromisoformat, default=None,
+                            help='Last day of generated history as YYYY-MM-DD (default today)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; equal seeds give equal datasets')
+        parser.add_argument('--prefix', default='synthetic', help='Username prefix (default synthetic)')
+        parser.add_argument('--password', default='synthetic', help='Password for the created users')
+        parser.add_argument('--replace', action='store_true', help='Delete users with this prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['replace']:
+            removed = delete_dataset(prefix)
+            self.stdout.write(f'Removed {removed} existing {prefix} users.')
+        elif User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users named {prefix}_* already exist; pass --replace or another --prefix')
+
+        started = time.perf_counter()
+        stats = generate_dataset(
+            users=options['users'],
+            years=options['years'],
+            per_day=options['per_day'],
+            recurring=options['recurring'],
+            end=options['end'] or date.today(),
+            seed=options['seed'],
+            prefix=prefix,
+            password=options['password'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {stats.users} users, {stats.expenses} expenses, {stats.budgets} budgets and '
+            f'{stats.recurring} recurring templates in {elapsed:.1f}s.'
+        ))
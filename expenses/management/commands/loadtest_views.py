@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from expenses.benchmarks import format_summary, run_in_subprocess, summarize
+
+READ_PATHS = ['/', '/day/', '/week/', '/month/', '/reports/']
+
+
+class Command(BaseCommand):
+    help = 'Compare read-view throughput through the WSGI (sync views) and ASGI (async views) handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username whose pages are requested')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per mode (default 500)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default 16)')
+        parser.add_argument('--worker', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        # Each mode runs in its own interpreter so URL routing picks the
+        # matching view implementations at import time
+        results = []
+        for mode, async_views in (('wsgi', '0'), ('asgi', '1')):
+            results.append(run_in_subprocess('loadtest_views', [
+                '--worker', mode,
+                '--user', options['user'],
+                '--requests', str(options['requests']),
+                '--concurrency', str(options['concurrency']),
+            ], {'EXPENSES_ASYNC_VIEWS': async_views}))
+
+        for result in results:
+            self.stdout.write(format_summary(result, 'req'))
+        self.stdout.write(json.dumps(results))
+
+    def run_worker(self, options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['user']}")
+
+        paths = [READ_PATHS[i % len(READ_PATHS)] for i in range(options['requests'])]
+        concurrency = max(1, options['concurrency'])
+        # The test clients send Host: testserver, as under the test runner
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if options['worker'] == 'wsgi':
+                result = self.run_wsgi(user, paths, concurrency)
+            else:
+                result = self.run_asgi(user, paths, concurrency)
+        self.stdout.write(json.dumps(result))
+
+    def run_wsgi(self, user, paths, concurrency):
+        def worker(share):
+            client = Client()
+            client.force_login(user)
+            latencies, failures = [], 0
+            for path in share:
+                start = time.perf_counter()
+                if client.get(path).status_code != 200:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+            connections.close_all()
+            return latencies, failures
+
+        shares = [paths[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(worker, shares))
+        elapsed = time.perf_counter() - started
+        return summarize('wsgi', [l for latencies, _ in outcomes for l in latencies], elapsed, sum(f for _, f in outcomes))
+
+    def run_asgi(self, user, paths, concurrency):
+        client = AsyncClient()
+        client.force_login(user)
+
+        async def worker(share):
+            latencies, failures = [], 0
+            for path in share:
+                start = time.perf_counter()
+                response = await client.get(path)
+                if response.status_code != 200:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+            return latencies, failures
+
+        async def run_all():
+            return await asyncio.gather(*(worker(paths[i::concurrency]) for i in range(concurrency)))
+
+        started = time.perf_counter()
+        outcomes = asyncio.run(run_all())
+        elapsed = time.perf_counter() - started
+        return summarize('asgi', [l for latencies, _ in outcomes for l in latencies], elapsed, sum(f for _, f in outcomes))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from expenses import rollups
+from expenses.management.utils import add_user_argument, resolve_users
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly per-category spending rollups from raw expenses'
+
+    def add_arguments(self, parser):
+        add_user_argument(parser, 'rebuild')
+
+    def handle(self, *args, **options):
+        users = resolve_users(options)
+
+        bucket_count = rollups.rebuild(users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {bucket_count} monthly rollup rows.'))
@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.budgets import copy_budgets
+from expenses.management.utils import add_user_argument, resolve_users
+from expenses.rollups import add_months, month_start
+
+
+def parse_month(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = "Copy every user's budgets from the previous month into a month that has none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=parse_month, default=None,
+                            help='Month to fill as YYYY-MM (default the current month)')
+        parser.add_argument('--from', type=parse_month, dest='source', default=None,
+                            help='Month to copy from as YYYY-MM (default the month before --month)')
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Replace amounts of budgets that already exist in the target month')
+        add_user_argument(parser, 'roll forward')
+
+    def handle(self, *args, **options):
+        target = options['month'] or month_start(date.today())
+        source = options['source'] or add_months(target, -1)
+        if source == target:
+            raise CommandError('--from must differ from --month')
+
+        users = resolve_users(options)
+
+        written = copy_budgets(source, target, users=users, overwrite=options['overwrite'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {written} budgets from {source.strftime('%B %Y')} to {target.strftime('%B %Y')}."
+        ))
@@ -0,0 +1,168 @@
+import json
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from expenses.models import Budget, Expense, RecurringExpense
+from expenses.recurring import generate_recurring_expenses
+from expenses.synthetic import synthetic_username
+
+
+def git_commit():
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def import_csv(rows, end):
+    lines = ['Date,Title,Amount,Category,Notes']
+    lines += [f'{end - timedelta(days=i % 90)},Benchmark import {i},{i % 80 + 1}.50,Food,' for i in range(rows)]
+    return '\n'.join(lines).encode()
+
+
+class Command(BaseCommand):
+    help = 'Time the main pages, exports, import and recurring generation and emit JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default=synthetic_username('synthetic', 1),
+                            help='Username to benchmark as (default synthetic_001, see generate_synthetic_data)')
+        parser.add_argument('--repeat', type=int, default=5, help='Samples per benchmark (default 5)')
+        parser.add_argument('--import-rows', type=int, default=2000, help='Rows in the imported CSV (default 2000)')
+        parser.add_argument('--only', action='append', default=None, help='Run only this benchmark (repeatable)')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+        parser.add_argument('--compare', help='Earlier JSON results to compare medians against')
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help='Fail if a median is slower than in --compare by more than this fraction')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['user']} (create one with generate_synthetic_data)")
+
+        benchmarks = self.benchmarks(user, options)
+        if options['only']:
+            unknown = set(options['only']) - set(benchmarks)
+            if unknown:
+                raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+            benchmarks = {name: run for name, run in benchmarks.items() if name in options['only']}
+
+        results = {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.vendor,
+            'dataset': {
+                'user': user.username,
+                'expenses': Expense.objects.filter(user=user).count(),
+                'budgets': Budget.objects.filter(user=user).count(),
+                'recurring': RecurringExpense.objects.filter(user=user).count(),
+            },
+            'repeat': options['repeat'],
+            'benchmarks': {},
+        }
+
+        # Nothing a benchmark writes (sessions, imports, generated rows) is kept
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            self.client = Client()
+            self.client.force_login(user)
+            for name, run in benchmarks.items():
+                results['benchmarks'][name] = self.measure(run, options['repeat'])
+                self.stdout.write(
+                    f"{name:>20}: median {results['benchmarks'][name]['median_ms']:9.1f} ms, "
+                    f"{results['benchmarks'][name]['queries']} queries"
+                )
+            transaction.set_rollback(True)
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['max_regression'])
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fileobj:
+                fileobj.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def benchmarks(self, user, options):
+        end = Expense.objects.filter(user=user).order_by('-date').values_list('date', flat=True).first() or date.today()
+        upload = import_csv(options['import_rows'], end)
+
+        def get(path, **params):
+            def run():
+                response = self.client.get(path, params)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} answered {response.status_code}')
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            return run
+
+        def import_file():
+            self.client.post('/import/', {'file': SimpleUploadedFile('benchmark.csv', upload)})
+
+        def generate_month():
+            generate_recurring_expenses(end, start_date=end - timedelta(days=29), users=[user])
+
+        return {
+            'home': get('/'),
+            'reports': get('/reports/'),
+            'export_csv': get('/export/', format='csv'),
+            'export_excel': get('/export/', format='excel'),
+            'export_pdf': get('/export/', format='pdf'),
+            'import_csv': import_file,
+            'recurring_generation': generate_month,
+        }
+
+    def measure(self, run, repeat):
+        samples = []
+        queries = None
+        for _ in range(max(1, repeat)):
+            # Cold cache and a clean slate for every sample
+            cache.clear()
+            with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - start)
+                transaction.set_rollback(True)
+            queries = len(captured.captured_queries)
+        samples_ms = sorted(sample * 1000 for sample in samples)
+        return {
+            'min_ms': round(samples_ms[0], 2),
+            'median_ms': round(statistics.median(samples_ms), 2),
+            'max_ms': round(samples_ms[-1], 2),
+            'queries': queries,
+        }
+
+    def compare(self, results, path, max_regression):
+        with open(path) as fileobj:
+            baseline = json.load(fileobj)
+        self.stdout.write(f"Compared with {baseline.get('commit') or path}:")
+        regressions = []
+        for name, current in results['benchmarks'].items():
+            previous = baseline.get('benchmarks', {}).get(name)
+            if not previous:
+                continue
+            change = current['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0
+            self.stdout.write(
+                f"{name:>20}: {previous['median_ms']:9.1f} -> {current['median_ms']:9.1f} ms ({change:+.0%}), "
+                f"queries {previous['queries']} -> {current['queries']}"
+            )
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+        results['compared_with'] = baseline.get('commit')
+        if regressions:
+            raise CommandError(f"Slower than {max_regression:.0%} over baseline: {', '.join(regressions)}")
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from expenses.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued import and export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            run_job(job)
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(f'{job} finished'))
+            else:
+                self.stderr.write(f'{job} failed: {job.error}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.startup import heavy_modules_loaded, measure_cold_start
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold-start import time with python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Runs to take the fastest of (default 3)')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules to list by cumulative time')
+        parser.add_argument('--max-ms', type=float, default=None, help='Fail if total import time exceeds this budget')
+
+    def handle(self, *args, **options):
+        profiles = [measure_cold_start() for _ in range(max(1, options['repeat']))]
+        profile = min(profiles, key=lambda p: p.total_us)
+        total_ms = profile.total_us / 1000
+
+        self.stdout.write(f'Cold start import time: {total_ms:.1f} ms ({len(profile.modules)} modules)')
+        slowest = sorted(profile.modules.items(), key=lambda item: item[1][1], reverse=True)[:options['top']]
+        for name, (self_us, cumulative_us) in slowest:
+            self.stdout.write(f'  {cumulative_us / 1000:9.1f} ms  {name}')
+
+        heavy = heavy_modules_loaded(profile)
+        if heavy:
+            raise CommandError(f"Heavy dependencies loaded at startup: {', '.join(heavy)}")
+        if options['max_ms'] is not None and total_ms > options['max_ms']:
+            raise CommandError(f"Cold start took {total_ms:.1f} ms, over the {options['max_ms']:.1f} ms budget")
+        self.stdout.write(self.style.SUCCESS('No heavy dependencies loaded at startup.'))
@@ -0,0 +1,21 @@
+# expenses/management/utils.py
+# Options shared by the expenses management commands
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+
+
+def add_user_argument(parser, action):
+    """--user USERNAME (repeatable) restricting the command to those users"""
+    parser.add_argument('--user', action='append', dest='usernames', default=None,
+                        help=f'Only {action} this username (repeatable); all users by default')
+
+
+def resolve_users(options):
+    """The users named with --user, or None (every user) without it"""
+    if not options['usernames']:
+        return None
+    users = list(User.objects.filter(username__in=options['usernames']))
+    missing = set(options['usernames']) - {user.username for user in users}
+    if missing:
+        raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+    return users
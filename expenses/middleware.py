@@ -0,0 +1,149 @@
+# expenses/middleware.py
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Requests kept per URL name for the rolling percentiles
+STATS_WINDOW = 500
+
+_samples = defaultdict(lambda: deque(maxlen=STATS_WINDOW))
+_samples_lock = threading.Lock()
+
+
+class QueryRecorder:
+    """Timings of every query run on behalf of one request"""
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+
+# Set for the duration of a request; contextvars follow the request into
+# sync_to_async threads, where the async ORM runs its queries
+_current_recorder = ContextVar('expenses_query_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.queries.append((sql, time.perf_counter() - start))
+
+
+def install_query_recorder():
+    """Add record_query to this thread's connections (they are per thread)"""
+    for conn in connections.all():
+        if record_query not in conn.execute_wrappers:
+            conn.execute_wrappers.append(record_query)
+
+
+class RequestStatsMiddleware:
+    """Per-request query count, DB time, view time and response size.
+
+    Adds a Server-Timing header, keeps rolling samples per URL name for
+    request_stats() and logs requests slower than EXPENSES_SLOW_REQUEST_MS
+    together with their queries. Enabled with EXPENSES_REQUEST_STATS=1.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_recorder()
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # Sync code of this request, including the async ORM, runs on the
+        # thread-sensitive executor thread
+        await sync_to_async(install_query_recorder)()
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    def record(self, request, response, recorder, elapsed):
+        db_time = recorder.db_time
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_time * 1000:.1f};desc="{len(recorder.queries)} queries"',
+            f'view;dur={elapsed * 1000:.1f}',
+        ])
+
+        match = request.resolver_match
+        name = (match.url_name or match.view_name) if match else 'unresolved'
+        with _samples_lock:
+            _samples[name].append((elapsed, db_time, len(recorder.queries), size))
+
+        slow_ms = getattr(settings, 'EXPENSES_SLOW_REQUEST_MS', None)
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            logger.warning(
+                'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms\n%s',
+                request.method, request.path, name, elapsed * 1000, len(recorder.queries), db_time * 1000,
+                '\n'.join(f'  {duration * 1000:8.1f} ms  {sql}' for sql, duration in recorder.queries),
+            )
+        return response
+
+
+def _percentile(ordered, fraction):
+    return ordered[max(0, int(len(ordered) * fraction + 0.5) - 1)]
+
+
+def request_stats():
+    """Rolling per-URL-name percentiles for this process, in milliseconds"""
+    with _samples_lock:
+        samples = {name: list(rows) for name, rows in _samples.items()}
+
+    stats = {}
+    for name, rows in sorted(samples.items()):
+        view_times = sorted(row[0] * 1000 for row in rows)
+        db_times = sorted(row[1] * 1000 for row in rows)
+        query_counts = sorted(row[2] for row in rows)
+        sizes = [row[3] for row in rows if row[3] is not None]
+        stats[name] = {
+            'requests': len(rows),
+            'view_p50_ms': round(_percentile(view_times, 0.5), 2),
+            'view_p95_ms': round(_percentile(view_times, 0.95), 2),
+            'db_p50_ms': round(_percentile(db_times, 0.5), 2),
+            'db_p95_ms': round(_percentile(db_times, 0.95), 2),
+            'queries_p50': _percentile(query_counts, 0.5),
+            'queries_max': query_counts[-1],
+            'response_bytes_avg': round(sum(sizes) / len(sizes)) if sizes else None,
+        }
+    return stats
+
+
+def reset_request_stats():
+    with _samples_lock:
+        _samples.clear()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-17 04:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='recurring_source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_expenses', to='expenses.recurringexpense'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Links expenses generated before recurring_source existed to their template.
+# Kept apart from the schema changes on either side: on PostgreSQL the
+# updated rows leave deferred foreign key checks pending, and the table
+# cannot be altered in the same transaction until they have run.
+
+from django.db import migrations
+
+
+def link_generated_expenses(apps, schema_editor):
+    """Attach previously generated expenses to their template by the old title/category/amount match"""
+    Expense = apps.get_model('expenses', 'Expense')
+    RecurringExpense = apps.get_model('expenses', 'RecurringExpense')
+
+    for recurring in RecurringExpense.objects.all():
+        matches = Expense.objects.filter(
+            user_id=recurring.user_id,
+            title=f"[Recurring] {recurring.title}",
+            category=recurring.category,
+            amount=recurring.amount,
+            recurring_source__isnull=True,
+        ).order_by('date', 'id')
+
+        # Only the first expense per day is linked so the unique constraint can be added
+        linked_ids = []
+        seen_dates = set()
+        for expense_id, expense_date in matches.values_list('id', 'date'):
+            if expense_date not in seen_dates:
+                seen_dates.add(expense_date)
+                linked_ids.append(expense_id)
+        for start in range(0, len(linked_ids), 500):
+            Expense.objects.filter(id__in=linked_ids[start:start + 500]).update(recurring_source_id=recurring.id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0011_expense_recurring_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_generated_expenses, migrations.RunPython.noop),
+    ]
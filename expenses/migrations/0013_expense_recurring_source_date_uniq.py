@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0012_link_generated_expenses'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(fields=('recurring_source', 'date'), name='expense_recurring_source_date_uniq'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-17 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    MonthlyCategoryTotal = apps.get_model('expenses', 'MonthlyCategoryTotal')
+
+    buckets = (
+        Expense.objects.annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    MonthlyCategoryTotal.objects.bulk_create(
+        [MonthlyCategoryTotal(**bucket) for bucket in buckets],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('expenses', '0013_expense_recurring_source_date_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('category', models.CharField(max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthlycategorytotal',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'category'), name='monthly_total_user_month_category_uniq'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
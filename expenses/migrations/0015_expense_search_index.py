@@ -0,0 +1,82 @@
+# Full-text index over Expense.title and Expense.notes, see expenses/search.py
+
+from django.db import migrations
+
+# SQLite: an external content FTS5 table over expenses_expense, kept in sync
+# by triggers. Note that SQLite drops these triggers whenever a later
+# migration rebuilds expenses_expense (most AlterField/RemoveField
+# operations do); such a migration has to run SQLITE_TRIGGERS again.
+SQLITE_TABLE = """
+CREATE VIRTUAL TABLE expenses_expense_fts USING fts5(
+    title, notes,
+    content='expenses_expense', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER expenses_expense_fts_insert AFTER INSERT ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(rowid, title, notes) VALUES (new.id, new.title, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_expense_fts_delete AFTER DELETE ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, title, notes)
+        VALUES ('delete', old.id, old.title, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_expense_fts_update AFTER UPDATE OF title, notes ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, title, notes)
+        VALUES ('delete', old.id, old.title, old.notes);
+        INSERT INTO expenses_expense_fts(rowid, title, notes) VALUES (new.id, new.title, new.notes);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_update',
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_delete',
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_insert',
+    'DROP TABLE IF EXISTS expenses_expense_fts',
+]
+
+# PostgreSQL: an expression index; the expression must stay identical to
+# SEARCH_VECTOR_SQL in expenses/search.py
+POSTGRESQL_INDEX = """
+CREATE INDEX expense_search_vector_idx ON expenses_expense
+USING GIN (to_tsvector('simple', title || ' ' || coalesce(notes, '')))
+"""
+
+POSTGRESQL_DROP = ['DROP INDEX IF EXISTS expense_search_vector_idx']
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+        for trigger in SQLITE_TRIGGERS:
+            schema_editor.execute(trigger)
+        # Index the rows that already exist
+        schema_editor.execute("INSERT INTO expenses_expense_fts(expenses_expense_fts) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = SQLITE_DROP if vendor == 'sqlite' else POSTGRESQL_DROP if vendor == 'postgresql' else []
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0014_monthlycategorytotal'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
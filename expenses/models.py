@@ -1,4 +1,7 @@
 # expenses/models.py
+import calendar
+from datetime import date, timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -17,6 +20,24 @@ class Expense(models.Model):
     date = models.DateField()
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='Other')
     notes = models.TextField(blank=True, null=True)
+    # Template this expense was generated from, if any
+    recurring_source = models.ForeignKey(
+        'RecurringExpense',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='generated_expenses',
+    )
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination over (date, id) and per-user date range scans
+            models.Index(fields=['user', 'date', 'id'], name='expense_user_date_id_idx'),
+        ]
+        constraints = [
+            # A template generates at most one expense per day
+            models.UniqueConstraint(fields=['recurring_source', 'date'], name='expense_recurring_source_date_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.amount}"
@@ -45,6 +66,25 @@ class Budget(models.Model):
         return f"{self.user.username} - {self.category} Budget: {self.amount} ({self.month.strftime('%B %Y')})"
 
 
+class RecurringExpenseQuerySet(models.QuerySet):
+    def overlapping(self, start, end):
+        """Active templates that run on at least one day of start..end"""
+        return self.filter(is_active=True, start_date__lte=end).filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=start)
+        )
+
+    def occurrences(self, start, end):
+        """(template, date) for every occurrence in start..end, ordered by date.
+
+        Iterates the queryset's result cache when it has already been
+        evaluated, so no further query is made.
+        """
+        return sorted(
+            ((template, day) for template in self for day in template.occurrences(start, end)),
+            key=lambda item: (item[1], item[0].pk or 0),
+        )
+
+
 class RecurringExpense(models.Model):
     FREQUENCY_CHOICES = [
         ('monthly', 'Monthly'),
@@ -74,9 +114,51 @@ class RecurringExpense(models.Model):
     notes = models.TextField(blank=True, null=True)
     last_generated = models.DateField(blank=True, null=True)
 
+    objects = RecurringExpenseQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} - {self.amount} ({self.frequency})"
 
+    def monthly_day(self, year, month):
+        """Day of the given month a monthly template falls on: start_date's
+        day, or the month's last day when the month is shorter"""
+        return min(self.start_date.day, calendar.monthrange(year, month)[1])
+
+    def active_span(self, start, end):
+        """(first, last) part of start..end in which the template runs, or None"""
+        if not self.is_active:
+            return None
+        first = max(start, self.start_date)
+        last = min(end, self.end_date) if self.end_date else end
+        return (first, last) if first <= last else None
+
+    def occurrences(self, start, end):
+        """Every date in start..end the template is due on, in order.
+
+        Computed per occurrence rather than per day; agrees with
+        should_generate_expense for every date.
+        """
+        span = self.active_span(start, end)
+        if span is None:
+            return []
+        first, last = span
+
+        if self.frequency == 'daily':
+            return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+        if self.frequency == 'weekly':
+            first += timedelta(days=(self.start_date.weekday() - first.weekday()) % 7)
+            return [first + timedelta(days=offset) for offset in range(0, (last - first).days + 1, 7)]
+        if self.frequency == 'monthly':
+            dates = []
+            year, month = first.year, first.month
+            while (year, month) <= (last.year, last.month):
+                day = date(year, month, self.monthly_day(year, month))
+                if first <= day <= last:
+                    dates.append(day)
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            return dates
+        return []
+
     def should_generate_expense(self, target_date):
         """Check if an expense should be generated for the given date"""
         if not self.is_active:
@@ -90,8 +172,9 @@ class RecurringExpense(models.Model):
 
         # Check based on frequency
         if self.frequency == 'monthly':
-            # Generate on the same day of month as start_date
-            return target_date.day == self.start_date.day
+            # Generate on the same day of month as start_date, or on the
+            # last day of months that are shorter
+            return target_date.day == self.monthly_day(target_date.year, target_date.month)
         elif self.frequency == 'weekly':
             # Generate on the same weekday as start_date
             return target_date.weekday() == self.start_date.weekday()
@@ -100,3 +183,69 @@ class RecurringExpense(models.Model):
             return True
 
         return False
+
+
+class Job(models.Model):
+    """A background import or export processed by the run_jobs worker"""
+    KIND_CHOICES = [
+        ('import', 'Import'),
+        ('export', 'Export'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    params = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', blank=True)
+    result_file = models.FileField(upload_to='jobs/results/', blank=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def percent_complete(self):
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, int(self.progress * 100 / self.total))
+
+
+class MonthlyCategoryTotal(models.Model):
+    """Running per-user, per-month, per-category expense totals.
+
+    Maintained incrementally by expenses.rollups; rebuild with the
+    rebuild_rollups management command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    category = models.CharField(max_length=50)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='monthly_total_user_month_category_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.category} {self.month.strftime('%B %Y')}: {self.total}"
@@ -0,0 +1,73 @@
+# expenses/pagination.py
+import base64
+import binascii
+from collections import namedtuple
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def encode_cursor(expense_date, expense_id):
+    """Encode the (date, id) position of the last row on a page"""
+    raw = f"{expense_date.isoformat()}:{expense_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into a (date, id) tuple, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_str, id_str = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return date.fromisoformat(date_str), int(id_str)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a user supplied page size to 1..MAX_PAGE_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def _seek(queryset, cursor, page_size, date_field):
+    queryset = queryset.order_by(f'-{date_field}', '-id')
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        last_date, last_id = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': last_date}) | Q(**{date_field: last_date, 'id__lt': last_id})
+        )
+
+    # Fetch one extra row to know whether another page exists
+    return queryset[:page_size + 1]
+
+
+def _page(items, page_size, date_field):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(getattr(items[-1], date_field), items[-1].id)
+    return Page(items, next_cursor)
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, date_field='date'):
+    """Return one page of rows newest first, seeking past the cursor.
+
+    Rows are ordered by (-date_field, -id) and the next page starts strictly
+    after the last row of the previous one, so the cost of a page is
+    independent of how deep into the history it is (no OFFSET scan).
+    """
+    return _page(list(_seek(queryset, cursor, page_size, date_field)), page_size, date_field)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, date_field='date'):
+    items = [item async for item in _seek(queryset, cursor, page_size, date_field)]
+    return _page(items, page_size, date_field)
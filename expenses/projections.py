@@ -0,0 +1,99 @@
+# expenses/projections.py
+# Upcoming charges from recurring templates, computed without writing
+# expenses from RecurringExpense.occurrences instead of testing
+# should_generate_expense day by day.
+import json
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from .budgets import budget_level
+from .models import Budget, RecurringExpense
+from .rollups import add_months, month_start
+
+# Longest window a projection may cover
+MAX_PROJECTION_DAYS = 2 * 366
+
+
+def project_recurring(user, start, end):
+    """Projected recurring charges per day and per month for start..end.
+
+    Two queries: the active templates overlapping the window and the budgets
+    of its months. Daily templates are added to the per-day totals through a
+    difference array, so their cost does not grow with the window; weekly
+    and monthly ones add one entry per occurrence. Each month is compared
+    with its Overall budget.
+    """
+    templates = RecurringExpense.objects.filter(user=user).overlapping(start, end).order_by('start_date', 'id')
+    budgets = dict(
+        Budget.objects.filter(user=user, category='Overall', month__gte=month_start(start), month__lte=end)
+        .values_list('month', 'amount')
+    )
+
+    length = (end - start).days + 1
+    # change[i] is how much the daily rate changes on start + i days
+    change = [Decimal('0')] * (length + 1)
+    totals = [Decimal('0')] * length
+    by_category = defaultdict(lambda: defaultdict(Decimal))
+    for recurring in templates:
+        span = recurring.active_span(start, end)
+        if span is None:
+            continue
+        if recurring.frequency == 'daily':
+            first, last = span
+            change[(first - start).days] += recurring.amount
+            change[(last - start).days + 1] -= recurring.amount
+            # Per-month share: the days of each month the template covers
+            month = month_start(first)
+            while month <= last:
+                covered = (min(last, add_months(month, 1) - timedelta(days=1)) - max(first, month)).days + 1
+                by_category[month][recurring.category] += recurring.amount * covered
+                month = add_months(month, 1)
+            continue
+        for day in recurring.occurrences(start, end):
+            totals[(day - start).days] += recurring.amount
+            by_category[month_start(day)][recurring.category] += recurring.amount
+
+    rate = Decimal('0')
+    for index in range(length):
+        rate += change[index]
+        totals[index] += rate
+
+    months = []
+    month = month_start(start)
+    while month <= end:
+        categories = by_category.get(month, {})
+        total = sum(categories.values(), Decimal('0'))
+        budget = budgets.get(month)
+        months.append({
+            'month': month,
+            'total': total,
+            'categories': sorted(categories.items()),
+            'budget': budget,
+            'remaining': budget - total if budget is not None else None,
+            'level': budget_level(budget, total),
+        })
+        month = add_months(month, 1)
+
+    return {
+        'start': start,
+        'end': end,
+        'templates': templates,
+        'days': [(start + timedelta(days=index), total) for index, total in enumerate(totals)],
+        'months': months,
+        'total': sum(totals, Decimal('0')),
+    }
+
+
+def upcoming_charges(templates, start, end):
+    """(date, template) for every occurrence of templates (a queryset, reused
+    from project_recurring without another query) in start..end"""
+    return [(day, recurring) for recurring, day in templates.occurrences(start, end)]
+
+
+def chart_data(projection):
+    """JSON label and value arrays of the per-day totals for Chart.js"""
+    return {
+        'day_labels': json.dumps([day.isoformat() for day, _ in projection['days']]),
+        'day_totals': json.dumps([float(total) for _, total in projection['days']]),
+    }
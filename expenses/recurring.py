@@ -0,0 +1,95 @@
+# expenses/recurring.py
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+
+from .models import Expense, RecurringExpense
+from .signals import expenses_bulk_created
+
+RECURRING_TITLE_PREFIX = '[Recurring] '
+BATCH_SIZE = 1000
+# Inserts tried before giving up when concurrent runs keep conflicting
+INSERT_ATTEMPTS = 3
+
+
+def recurring_expense_title(recurring):
+    return f"{RECURRING_TITLE_PREFIX}{recurring.title}"
+
+
+def due_dates(recurring, end_date, start_date=None):
+    """Dates in the window on which the template is due.
+
+    Without start_date the window resumes the day after last_generated
+    (or at the template's start_date), which back-fills missed days.
+    """
+    first = start_date
+    if first is None:
+        first = recurring.last_generated + timedelta(days=1) if recurring.last_generated else recurring.start_date
+    return recurring.occurrences(first, end_date)
+
+
+def _generated_pairs(occurrences, users):
+    """(recurring_source_id, date) pairs already generated over the window of occurrences"""
+    window = [day for _, day in occurrences]
+    rows = Expense.objects.filter(recurring_source__isnull=False, date__range=(min(window), max(window)))
+    if users is not None:
+        rows = rows.filter(user__in=users)
+    return set(rows.values_list('recurring_source_id', 'date'))
+
+
+def generate_recurring_expenses(end_date, start_date=None, users=None):
+    """Create the expenses due from active recurring templates up to end_date.
+
+    Occurrences are computed in memory, filtered against already generated
+    (recurring_source, date) pairs with a single query over the window,
+    then inserted with bulk_create in a savepoint. If a concurrent run
+    inserted some of them first, the unique constraint rolls the savepoint
+    back and the insert is retried without the pairs that now exist, so
+    only rows this run persisted are counted and sent with
+    expenses_bulk_created. Templates' last_generated is advanced with
+    bulk_update. Returns the number of expenses created.
+    """
+    templates = RecurringExpense.objects.filter(is_active=True, start_date__lte=end_date)
+    if users is not None:
+        templates = templates.filter(user__in=users)
+
+    occurrences = [
+        (recurring, day)
+        for recurring in templates
+        for day in due_dates(recurring, end_date, start_date)
+    ]
+    if not occurrences:
+        return 0
+
+    touched = {}
+    for recurring, day in occurrences:
+        if recurring.last_generated is None or day > recurring.last_generated:
+            recurring.last_generated = day
+            touched[recurring.pk] = recurring
+
+    for attempt in range(INSERT_ATTEMPTS):
+        existing = _generated_pairs(occurrences, users)
+        new_expenses = [
+            Expense(
+                user_id=recurring.user_id,
+                recurring_source=recurring,
+                title=recurring_expense_title(recurring),
+                amount=recurring.amount,
+                date=day,
+                category=recurring.category,
+                notes=f"Auto-generated from recurring expense. {recurring.notes or ''}",
+            )
+            for recurring, day in occurrences
+            if (recurring.pk, day) not in existing
+        ]
+        try:
+            with transaction.atomic():
+                Expense.objects.bulk_create(new_expenses, batch_size=BATCH_SIZE)
+                expenses_bulk_created.send(sender=Expense, expenses=new_expenses)
+                RecurringExpense.objects.bulk_update(list(touched.values()), ['last_generated'], batch_size=BATCH_SIZE)
+        except IntegrityError:
+            # Lost a race with a concurrent run; re-read what it generated
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+            continue
+        return len(new_expenses)
@@ -0,0 +1,108 @@
+# expenses/reports.py
+import asyncio
+import json
+from datetime import timedelta
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+from . import rollups
+from .models import Budget, Expense, MonthlyCategoryTotal
+
+# Bucket expression per granularity; days are bucketed by the date itself
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+GROUP_BY_FIELDS = ('category',)
+
+
+def _overall_budgets_query(user):
+    return Budget.objects.filter(user=user, category='Overall').values_list('month', 'amount')
+
+
+def assemble_report(monthly_totals, category_totals, budgets_by_month):
+    """Chart data and summary tables for the reports page"""
+    # Single pass over the months for both the chart series and the summary table
+    monthly_labels = []
+    monthly_data = []
+    monthly_rows = []
+    for item in monthly_totals:
+        budget = budgets_by_month.get(item['month'])
+        monthly_labels.append(item['month'].strftime('%B %Y'))
+        monthly_data.append(float(item['total']))
+        monthly_rows.append({
+            'month': item['month'],
+            'total': item['total'],
+            'budget': budget,
+            'variance': budget - item['total'] if budget is not None else None,
+        })
+
+    category_labels = [item['category'] for item in category_totals]
+    category_data = [float(item['total']) for item in category_totals]
+
+    return {
+        'monthly_labels': json.dumps(monthly_labels),
+        'monthly_data': json.dumps(monthly_data),
+        'category_labels': json.dumps(category_labels),
+        'category_data': json.dumps(category_data),
+        'monthly_rows': monthly_rows,
+        'category_totals': category_totals,
+    }
+
+
+def report_payload(user):
+    # Monthly and category totals from the rollup table, plus one budget
+    # lookup per month instead of scanning every budget per row
+    return assemble_report(
+        rollups.monthly_totals(user),
+        rollups.category_totals(user),
+        dict(_overall_budgets_query(user)),
+    )
+
+
+async def areport_payload(user):
+    """report_payload with the three independent queries issued concurrently"""
+    async def budgets_by_month():
+        return {month: amount async for month, amount in _overall_budgets_query(user)}
+
+    monthly_totals, category_totals, budgets = await asyncio.gather(
+        rollups.amonthly_totals(user),
+        rollups.acategory_totals(user),
+        budgets_by_month(),
+    )
+    return assemble_report(monthly_totals, category_totals, budgets)
+
+
+def _covers_whole_months(start, end):
+    return start.day == 1 and (end + timedelta(days=1)).day == 1
+
+
+def bucket_totals(user, start, end, granularity, group_by=None):
+    """[{'period', [group_by,] 'total', 'count'}] for start..end inclusive.
+
+    Buckets are computed in one grouped query. Month and coarser buckets
+    over whole months are summed from the rollup table; everything else
+    aggregates expenses over the (user, date) index range.
+    """
+    trunc = GRANULARITIES[granularity]
+    groups = [group_by] if group_by else []
+
+    if trunc is not None and granularity != 'week' and _covers_whole_months(start, end):
+        queryset = MonthlyCategoryTotal.objects.filter(user=user, month__gte=start, month__lte=end, count__gt=0)
+        period = trunc('month')
+        totals = {'total': Sum('total'), 'count': Sum('count')}
+    else:
+        queryset = Expense.objects.filter(user=user, date__gte=start, date__lte=end)
+        period = trunc('date') if trunc is not None else F('date')
+        totals = {'total': Sum('amount'), 'count': Count('id')}
+
+    return list(
+        queryset.annotate(period=period)
+        .values('period', *groups)
+        .annotate(**totals)
+        .order_by('period', *groups)
+    )
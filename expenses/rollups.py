@@ -0,0 +1,115 @@
+# expenses/rollups.py
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Expense, MonthlyCategoryTotal
+
+
+def month_start(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    """First day of the month count months after (or before) month"""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def expense_key(expense):
+    return (expense.user_id, month_start(expense.date), expense.category)
+
+
+def collect_deltas(expenses, sign=1):
+    """Sum (amount, count) changes per (user, month, category) bucket"""
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for expense in expenses:
+        delta = deltas[expense_key(expense)]
+        delta[0] += sign * Decimal(str(expense.amount))
+        delta[1] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Add the collected changes to the rollup table, one statement per bucket"""
+    for (user_id, month, category), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        bucket = MonthlyCategoryTotal.objects.filter(user_id=user_id, month=month, category=category)
+        if bucket.update(total=F('total') + amount, count=F('count') + count):
+            continue
+        # Removing from a bucket that does not exist (e.g. during a cascading
+        # user delete) leaves nothing to track
+        if count < 0:
+            continue
+        try:
+            with transaction.atomic():
+                MonthlyCategoryTotal.objects.create(
+                    user_id=user_id, month=month, category=category, total=amount, count=count
+                )
+        except IntegrityError:
+            # Created concurrently since the update above
+            bucket.update(total=F('total') + amount, count=F('count') + count)
+
+
+def record_expenses_added(expenses):
+    apply_deltas(collect_deltas(expenses))
+
+
+def rebuild(users=None):
+    """Recompute the rollup table from raw expenses for the given users (or everyone)"""
+    expenses = Expense.objects.all()
+    rollups = MonthlyCategoryTotal.objects.all()
+    if users is not None:
+        expenses = expenses.filter(user__in=users)
+        rollups = rollups.filter(user__in=users)
+
+    buckets = (
+        expenses.annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        rows = MonthlyCategoryTotal.objects.bulk_create(
+            (MonthlyCategoryTotal(**bucket) for bucket in buckets.iterator()),
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def _user_rollups(user):
+    return MonthlyCategoryTotal.objects.filter(user=user, count__gt=0)
+
+
+def _monthly_totals_query(user):
+    return _user_rollups(user).values('month').annotate(total=Sum('total')).order_by('month')
+
+
+def _category_totals_query(user):
+    return _user_rollups(user).values('category').annotate(total=Sum('total')).order_by('-total')
+
+
+def monthly_totals(user):
+    """[{'month', 'total'}] for every month with expenses, oldest first"""
+    return list(_monthly_totals_query(user))
+
+
+def category_totals(user):
+    """[{'category', 'total'}] across the user's whole history, largest first"""
+    return list(_category_totals_query(user))
+
+
+async def amonthly_totals(user):
+    return [row async for row in _monthly_totals_query(user)]
+
+
+async def acategory_totals(user):
+    return [row async for row in _category_totals_query(user)]
@@ -0,0 +1,94 @@
+# expenses/search.py
+# Ranked full-text search over expense titles and notes.
+#
+# SQLite: the expenses_expense_fts FTS5 table (external content, kept in sync
+# by triggers, see migration 0015). PostgreSQL: a GIN index on
+# SEARCH_VECTOR_SQL. Other backends fall back to an unindexed icontains scan.
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Expense
+
+SEARCH_LIMIT = 50
+
+FTS_TABLE = 'expenses_expense_fts'
+
+# Must match the indexed expression in migration 0015 exactly, or PostgreSQL
+# will not use the index
+SEARCH_VECTOR_SQL = "to_tsvector('simple', e.title || ' ' || coalesce(e.notes, ''))"
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    """Split free text into lowercase word terms; punctuation is dropped"""
+    return [term.lower() for term in _TERM_RE.findall(query or '')]
+
+
+def _fts5_query(terms):
+    # Every term must match; each one as a prefix ("tax" finds "taxi")
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _filters(user, category, start, end):
+    clauses = ['e.user_id = %s']
+    params = [user.id]
+    if category:
+        clauses.append('e.category = %s')
+        params.append(category)
+    if start:
+        clauses.append('e.date >= %s')
+        params.append(start.isoformat())
+    if end:
+        clauses.append('e.date <= %s')
+        params.append(end.isoformat())
+    return ' AND '.join(clauses), params
+
+
+def search_expenses(user, query, category=None, start=None, end=None, limit=SEARCH_LIMIT):
+    """Return up to limit of the user's expenses matching every word of query.
+
+    Best matches come first (ties newest first); each word also matches
+    longer words it is a prefix of. Results are Expense instances with a
+    rank attribute, lower is better on SQLite (bm25) and higher is better
+    on PostgreSQL (ts_rank).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    where, params = _filters(user, category, start, end)
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT e.*, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} '
+            f'JOIN expenses_expense e ON e.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND {where} '
+            'ORDER BY rank, e.date DESC, e.id DESC LIMIT %s'
+        )
+        return list(Expense.objects.raw(sql, [_fts5_query(terms), *params, limit]))
+
+    if connection.vendor == 'postgresql':
+        sql = (
+            f'SELECT e.*, ts_rank({SEARCH_VECTOR_SQL}, query) AS rank '
+            "FROM expenses_expense e, to_tsquery('simple', %s) query "
+            f'WHERE {SEARCH_VECTOR_SQL} @@ query AND {where} '
+            'ORDER BY rank DESC, e.date DESC, e.id DESC LIMIT %s'
+        )
+        return list(Expense.objects.raw(sql, [_tsquery(terms), *params, limit]))
+
+    queryset = Expense.objects.filter(user=user)
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(notes__icontains=term))
+    if category:
+        queryset = queryset.filter(category=category)
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    return list(queryset.order_by('-date', '-id')[:limit])
@@ -0,0 +1,131 @@
+# expenses/serializers.py
+from datetime import date, timedelta
+
+from rest_framework import serializers
+
+from .models import Budget, Expense, RecurringExpense
+from .pagination import MAX_PAGE_SIZE
+from .projections import MAX_PROJECTION_DAYS
+from .reports import GRANULARITIES, GROUP_BY_FIELDS
+from .rollups import month_start
+from .search import SEARCH_LIMIT
+
+# Most rows accepted by one bulk create or delete request
+MAX_BULK_SIZE = 1000
+
+
+class FieldSelectionMixin:
+    """Limit output to the comma separated ?fields= of the request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = selected_fields(self.context.get('request'))
+        if selected:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+
+def selected_fields(request):
+    """Field names requested with ?fields=, or None for all fields"""
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class ExpenseSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Expense
+        fields = ['id', 'title', 'amount', 'date', 'category', 'notes', 'recurring_source']
+        read_only_fields = ['recurring_source']
+
+
+class BudgetSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Budget
+        fields = ['id', 'category', 'amount', 'month', 'is_overall']
+        read_only_fields = ['is_overall']
+
+    def validate_month(self, value):
+        # Budgets are keyed by the first day of their month
+        return month_start(value)
+
+    def validate_amount(self, value):
+        if value < 0:
+            raise serializers.ValidationError('Amount cannot be negative.')
+        return value
+
+
+class CopyBudgetsSerializer(serializers.Serializer):
+    source = serializers.DateField()
+    target = serializers.DateField()
+    overwrite = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        attrs['source'], attrs['target'] = month_start(attrs['source']), month_start(attrs['target'])
+        if attrs['source'] == attrs['target']:
+            raise serializers.ValidationError({'target': 'Choose a month other than the source month.'})
+        return attrs
+
+
+class RecurringExpenseSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = RecurringExpense
+        fields = [
+            'id', 'title', 'amount', 'category', 'frequency', 'start_date', 'end_date',
+            'is_active', 'notes', 'last_generated',
+        ]
+        read_only_fields = ['last_generated']
+
+    def validate(self, attrs):
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start and end and end < start:
+            raise serializers.ValidationError({'end_date': 'End date cannot be before the start date.'})
+        return attrs
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BULK_SIZE,
+    )
+
+
+class AggregateQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    granularity = serializers.ChoiceField(choices=list(GRANULARITIES), default='month')
+    group_by = serializers.ChoiceField(choices=GROUP_BY_FIELDS, required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': 'End date cannot be before the start date.'})
+        return attrs
+
+
+class ProjectionQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(default=date.today)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('end', attrs['start'] + timedelta(days=364))
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': 'End date cannot be before the start date.'})
+        if (attrs['end'] - attrs['start']).days >= MAX_PROJECTION_DAYS:
+            raise serializers.ValidationError({'end': f'Project at most {MAX_PROJECTION_DAYS} days at once.'})
+        return attrs
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    category = serializers.ChoiceField(choices=Expense.CATEGORY_CHOICES, required=False, allow_blank=True)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_PAGE_SIZE, default=SEARCH_LIMIT)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': 'End date cannot be before the start date.'})
+        return attrs
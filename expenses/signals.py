@@ -0,0 +1,146 @@
+# expenses/signals.py
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import rollups
+from .cache import invalidate_user_months
+from .models import Budget, Expense
+
+# Sent with expenses=[...] after Expense rows are inserted with bulk_create,
+# which bypasses post_save. expenses must hold only rows that were actually
+# persisted: the receivers add every one of them to the rollups, so senders
+# must not use ignore_conflicts, which leaves skipped rows in the list.
+expenses_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_expense(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Expense.objects.filter(pk=instance.pk).only(
+            'user_id', 'date', 'category', 'amount'
+        ).first()
+
+
+@receiver(post_save, sender=Expense)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = rollups.collect_deltas([instance])
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        _merge_deltas(deltas, rollups.collect_deltas([previous], sign=-1))
+    _apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    _apply_deltas(rollups.collect_deltas([instance], sign=-1))
+
+
+@receiver(expenses_bulk_created)
+def update_rollups_on_bulk_create(sender, expenses, **kwargs):
+    rollups.record_expenses_added(expenses)
+
+
+def invalidate_cached_months(user_id, months):
+    """Invalidate now and again once the transaction commits, so a value
+    recomputed from pre-commit data in between is not left behind"""
+    months = list(months)
+    invalidate_user_months(user_id, months)
+    transaction.on_commit(lambda: invalidate_user_months(user_id, months))
+
+
+@receiver(post_save, sender=Expense)
+def invalidate_cache_on_expense_save(sender, instance, raw=False, **kwargs):
+    months = [instance.date]
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        months.append(previous.date)
+    _invalidate(instance.user_id, months)
+
+
+@receiver(post_delete, sender=Expense)
+def invalidate_cache_on_expense_delete(sender, instance, **kwargs):
+    _invalidate(instance.user_id, [instance.date])
+
+
+# Per-row Expense signals sent inside coalesce_expense_signals() park their
+# work here instead of touching the rollups and cache one row at a time
+_coalescing = threading.local()
+
+
+@contextmanager
+def coalesce_expense_signals():
+    """Apply the rollup and cache updates of the per-row Expense signals sent
+    in the block once per bucket when it exits, e.g. around QuerySet.delete(),
+    which sends post_delete for every row"""
+    if getattr(_coalescing, 'pending', None) is not None:
+        yield
+        return
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    months_by_user = defaultdict(set)
+    _coalescing.pending = (deltas, months_by_user)
+    try:
+        yield
+    finally:
+        _coalescing.pending = None
+    rollups.apply_deltas(deltas)
+    for user_id, months in months_by_user.items():
+        invalidate_cached_months(user_id, months)
+
+
+def _merge_deltas(into, deltas):
+    for key, (amount, count) in deltas.items():
+        into[key][0] += amount
+        into[key][1] += count
+
+
+def _apply_deltas(deltas):
+    pending = getattr(_coalescing, 'pending', None)
+    if pending is None:
+        rollups.apply_deltas(deltas)
+    else:
+        _merge_deltas(pending[0], deltas)
+
+
+def _invalidate(user_id, months):
+    pending = getattr(_coalescing, 'pending', None)
+    if pending is None:
+        invalidate_cached_months(user_id, months)
+    else:
+        pending[1][user_id].update(rollups.month_start(month) for month in months)
+
+
+@receiver(expenses_bulk_created)
+def invalidate_cache_on_bulk_create(sender, expenses, **kwargs):
+    months_by_user = defaultdict(set)
+    for expense in expenses:
+        months_by_user[expense.user_id].add(rollups.month_start(expense.date))
+    for user_id, months in months_by_user.items():
+        invalidate_cached_months(user_id, months)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_cache_on_budget_change(sender, instance, **kwargs):
+    invalidate_cached_months(instance.user_id, [instance.month])
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        if settings.SQLITE_WAL:
+            cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
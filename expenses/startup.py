@@ -0,0 +1,53 @@
+# expenses/startup.py
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+
+# Packages that only the import/export paths need; loading any of them while
+# a worker boots is a regression
+HEAVY_PACKAGES = ('pandas', 'numpy', 'reportlab', 'openpyxl')
+
+# What a worker imports before serving its first request: the WSGI
+# application (which runs django.setup()) and the URLconf with every view
+COLD_START_SCRIPT = 'import expense_tracker.wsgi, expense_tracker.urls'
+
+StartupProfile = namedtuple('StartupProfile', ['total_us', 'modules'])
+
+
+def parse_importtime(output):
+    """Parse ``python -X importtime`` output into {module: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            # Header row ("self [us] | cumulative | imported package")
+            continue
+    return modules
+
+
+def measure_cold_start(script=COLD_START_SCRIPT):
+    """Import the project in a fresh interpreter and return its import profile"""
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'expense_tracker.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = parse_importtime(result.stderr)
+    return StartupProfile(sum(self_us for self_us, _ in modules.values()), modules)
+
+
+def heavy_modules_loaded(profile):
+    """Heavy packages imported during the measured cold start"""
+    return sorted({name.split('.')[0] for name in profile.modules} & set(HEAVY_PACKAGES))
@@ -0,0 +1,137 @@
+# expenses/synthetic.py
+# Reproducible synthetic datasets for benchmarking and load testing.
+import random
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import rollups
+from .models import Budget, Expense, RecurringExpense
+from .rollups import month_start
+from .signals import coalesce_expense_signals
+
+INSERT_BATCH_SIZE = 2000
+
+# (category, typical amount range, relative frequency)
+EXPENSE_PROFILE = [
+    ('Food', (4, 60), 50),
+    ('Travel', (2, 400), 15),
+    ('Utilities', (20, 250), 10),
+    ('Entertainment', (8, 120), 15),
+    ('Other', (1, 300), 10),
+]
+BUDGETED_CATEGORIES = ['Food', 'Travel', 'Entertainment']
+RECURRING_PROFILE = [
+    ('Rent', 'monthly', (800, 2500)),
+    ('Subscriptions', 'monthly', (5, 30)),
+    ('Utilities', 'monthly', (40, 200)),
+    ('Food', 'weekly', (30, 150)),
+    ('Travel', 'daily', (2, 10)),
+]
+
+DatasetStats = namedtuple('DatasetStats', ['users', 'expenses', 'budgets', 'recurring'])
+
+
+def synthetic_username(prefix, index):
+    return f'{prefix}_{index:03d}'
+
+
+def _amount(rng, low, high):
+    return Decimal(rng.uniform(low, high)).quantize(Decimal('0.01'))
+
+
+def _iter_expenses(user, rng, start, end, per_day):
+    categories = [category for category, _, _ in EXPENSE_PROFILE]
+    weights = [weight for _, _, weight in EXPENSE_PROFILE]
+    ranges = {category: amounts for category, amounts, _ in EXPENSE_PROFILE}
+    day = start
+    while day <= end:
+        # Vary the daily count around per_day so days are not uniform
+        for n in range(rng.randint(max(0, per_day // 2), per_day + per_day // 2)):
+            category = rng.choices(categories, weights)[0]
+            yield Expense(
+                user=user,
+                title=f'{category} {day:%b %d} #{n + 1}',
+                amount=_amount(rng, *ranges[category]),
+                date=day,
+                category=category,
+            )
+        day += timedelta(days=1)
+
+
+def _bulk_insert(model, objects):
+    """bulk_create from an iterable in fixed size batches; returns the row count"""
+    count = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == INSERT_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def _budgets(user, rng, start, end, per_day):
+    month = month_start(start)
+    while month <= end:
+        overall = Decimal(per_day * 30 * rng.randint(45, 75))
+        yield Budget(user=user, category='Overall', amount=overall, month=month, is_overall=True)
+        for category in BUDGETED_CATEGORIES:
+            yield Budget(user=user, category=category, amount=(overall / 5).quantize(Decimal('1')), month=month)
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def _recurring(user, rng, start, count):
+    for index in range(count):
+        category, frequency, amounts = RECURRING_PROFILE[index % len(RECURRING_PROFILE)]
+        yield RecurringExpense(
+            user=user,
+            title=f'{category} plan {index + 1}',
+            amount=_amount(rng, *amounts),
+            category=category,
+            frequency=frequency,
+            start_date=start + timedelta(days=rng.randint(0, 27)),
+        )
+
+
+def generate_dataset(users, years, per_day, recurring, end, seed=0, prefix='synthetic', password='synthetic'):
+    """Create users with years of daily expenses, monthly budgets and recurring templates.
+
+    Everything is inserted with bulk_create and the rollups are rebuilt once
+    at the end. The same seed produces the same dataset.
+    """
+    rng = random.Random(seed)
+    start = end - timedelta(days=round(365.25 * years) - 1)
+    stats = DatasetStats(users=0, expenses=0, budgets=0, recurring=0)
+
+    # Hash once; every synthetic user shares the password
+    hashed = make_password(password)
+    with transaction.atomic():
+        created = User.objects.bulk_create([
+            User(username=synthetic_username(prefix, index), password=hashed) for index in range(1, users + 1)
+        ])
+        for user in created:
+            stats = stats._replace(
+                users=stats.users + 1,
+                expenses=stats.expenses + _bulk_insert(Expense, _iter_expenses(user, rng, start, end, per_day)),
+                budgets=stats.budgets + _bulk_insert(Budget, _budgets(user, rng, start, end, per_day)),
+                recurring=stats.recurring + _bulk_insert(RecurringExpense, _recurring(user, rng, start, recurring)),
+            )
+        # Rows went in without the bulk signal; one rebuild is cheaper
+        rollups.rebuild(created)
+    return stats
+
+
+def delete_dataset(prefix='synthetic'):
+    """Remove the users (and, by cascade, all data) of an earlier dataset"""
+    with transaction.atomic(), coalesce_expense_signals():
+        _, deleted = User.objects.filter(username__startswith=f'{prefix}_').delete()
+    return deleted.get('auth.User', 0)
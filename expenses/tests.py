@@ -1,3 +1,836 @@
-from django.test import TestCase
+import json
+import math
+import random
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import budgets, recurring, rollups
+from .analytics import month_analytics
+from .budgets import check_batch_budget_alerts, copy_budgets, get_budget_status, upsert_budgets
+from .cache import cache_stats, get_dashboard_status, get_month_analytics, reset_cache_stats
+from .imports import import_expenses, normalize_columns, read_expense_file, validate_rows
+from .jobs import PROGRESS_EVERY, claim_next_job, run_job
+from .middleware import request_stats, reset_request_stats
+from .models import Budget, Expense, Job, MonthlyCategoryTotal, RecurringExpense
+from .projections import project_recurring
+from .recurring import due_dates, generate_recurring_expenses
+from .rollups import month_start
+from .search import search_expenses
+from .serializers import MAX_BULK_SIZE
+from .startup import heavy_modules_loaded, measure_cold_start
+
+# Volumes large enough that a per-row query would blow every budget below
+EXPENSE_COUNT = 3000
+HISTORY_DAYS = 3 * 365
+RECURRING_COUNT = 60
+# Rows written by the tests use fixed dates so the rollup buckets they touch,
+# and with them the query counts, do not depend on the day the suite runs
+RECURRING_START = date(2024, 1, 1)
+IMPORT_START = date(2031, 3, 1)
+CATEGORIES = [choice for choice, _ in Expense.CATEGORY_CHOICES]
+FREQUENCIES = ['daily', 'weekly', 'monthly']
+
+
+def seed_user(username, today=None):
+    """A user with three years of expenses, budgets for every month and
+    active recurring templates of each frequency"""
+    today = today or date.today()
+    user = User.objects.create_user(username, password='password')
+
+    Expense.objects.bulk_create([
+        Expense(
+            user=user,
+            title=f'Expense {i}',
+            amount=Decimal(i % 97 + 1),
+            date=today - timedelta(days=i % HISTORY_DAYS),
+            category=CATEGORIES[i % len(CATEGORIES)],
+        )
+        for i in range(EXPENSE_COUNT)
+    ], batch_size=1000)
+
+    months = sorted({month_start(today - timedelta(days=days)) for days in range(0, HISTORY_DAYS, 28)})
+    Budget.objects.bulk_create([
+        Budget(user=user, category=category, amount=amount, month=month, is_overall=category == 'Overall')
+        for month in months
+        for category, amount in (('Overall', Decimal('2000')), ('Food', Decimal('400')), ('Travel', Decimal('300')))
+    ])
+
+    RecurringExpense.objects.bulk_create([
+        RecurringExpense(
+            user=user,
+            title=f'Template {i}',
+            amount=Decimal('9.99'),
+            category='Subscriptions',
+            frequency=FREQUENCIES[i % len(FREQUENCIES)],
+            start_date=RECURRING_START + timedelta(days=i),
+        )
+        for i in range(RECURRING_COUNT)
+    ])
+
+    # Seeding used bulk_create without the bulk signal
+    rollups.rebuild([user])
+    return user
+
+
+def insert_statements(rows, batch_size=None):
+    """INSERTs one bulk_create() call issues for rows expenses; backends with
+    a bound parameter limit (SQLite) cap the rows per statement further"""
+    if not rows:
+        return 0
+    fields = [field for field in Expense._meta.concrete_fields if not field.primary_key]
+    per_statement = connection.ops.bulk_batch_size(fields, range(rows))
+    if batch_size:
+        per_statement = min(batch_size, per_statement)
+    return math.ceil(rows / per_statement)
+
+
+# A rollup bucket seen for the first time costs an UPDATE that misses plus
+# SAVEPOINT, INSERT and RELEASE; an existing bucket is a single UPDATE
+NEW_BUCKET_QUERIES = 4
+
+
+def expense_csv(rows, start):
+    lines = ['Date,Title,Amount,Category,Notes']
+    lines += [f'{start + timedelta(days=i % 60)},Imported {i},{i % 50 + 1}.25,Food,' for i in range(rows)]
+    return '\n'.join(lines).encode()
+
+
+class ColdStartTests(SimpleTestCase):
+    def test_worker_boot_does_not_load_heavy_dependencies(self):
+        profile = measure_cold_start()
+        self.assertIn('expense_tracker.wsgi', profile.modules)
+        self.assertEqual(heavy_modules_loaded(profile), [])
+
+
+class QueryBudgetTestCase(TestCase):
+    """Pins the number of queries per view against seeded data volumes.
+
+    Logged-in requests spend two queries loading the session and the user.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        cls.user = seed_user('budgeted', cls.today)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+
+class PageQueryTests(QueryBudgetTestCase):
+    def test_home(self):
+        # Page of expenses, then budgets and month spending in one query
+        with self.assertNumQueries(4):
+            response = self.client.get('/')
+        self.assertEqual(len(response.context['expenses']), 50)
+
+    def test_home_uses_cached_budget_status(self):
+        self.client.get('/')
+        with self.assertNumQueries(3):
+            self.client.get('/')
+
+    def test_home_later_page(self):
+        cursor = self.client.get('/').context['next_cursor']
+        with self.assertNumQueries(3):
+            response = self.client.get('/', {'cursor': cursor})
+        self.assertEqual(len(response.context['expenses']), 50)
+
+    def test_expenses_page_json(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/expenses/page/', {'page_size': 200})
+        self.assertEqual(len(response.json()['expenses']), 200)
+
+    def test_day_week_month(self):
+        for path in ('/day/', '/week/', '/month/'):
+            with self.subTest(path=path), self.assertNumQueries(3):
+                response = self.client.get(path)
+            self.assertTrue(response.context['expenses'])
+
+    def test_monthly_reports(self):
+        # Monthly and category totals from the rollups plus the budgets, then
+        # the daily totals and this month's budgets for the analytics
+        with self.assertNumQueries(7):
+            response = self.client.get('/reports/')
+        self.assertGreater(len(response.context['monthly_rows']), 30)
+        self.assertEqual(len(response.context['analytics']['monthly']), 25)
+        with self.assertNumQueries(2):
+            self.client.get('/reports/')
+
+    def test_budgets_and_recurring_lists(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/budgets/')
+        self.assertGreater(len(response.context['budgets']), 100)
+        with self.assertNumQueries(3):
+            response = self.client.get('/recurring/')
+        self.assertEqual(len(response.context['recurring_expenses']), RECURRING_COUNT)
+
+
+class WriteQueryTests(QueryBudgetTestCase):
+    def test_add_expense(self):
+        # Budget check, INSERT and the rollup UPDATE
+        with self.assertNumQueries(5):
+            self.client.post('/add/', {
+                'title': 'Lunch', 'amount': '12.50', 'date': self.today.isoformat(), 'category': 'Food',
+            })
+
+    def test_delete_expense(self):
+        expense = Expense.objects.filter(user=self.user).first()
+        with self.assertNumQueries(5):
+            self.client.get(f'/delete/{expense.id}/')
+        self.assertFalse(Expense.objects.filter(id=expense.id).exists())
+
+    def test_generate_recurring_expenses_view(self):
+        due = sum(
+            template.should_generate_expense(self.today)
+            for template in RecurringExpense.objects.filter(user=self.user)
+        )
+        # Session and user, templates and already generated rows, the INSERTs,
+        # the new bucket for this month's Subscriptions, last_generated and
+        # the savepoint pair
+        with self.assertNumQueries(2 + 2 + insert_statements(due, 1000) + NEW_BUCKET_QUERIES + 1 + 2):
+            self.client.get('/recurring/generate/')
+        self.assertEqual(Expense.objects.filter(user=self.user, recurring_source__isnull=False).count(), due)
+
+
+class GenerationQueryTests(QueryBudgetTestCase):
+    def test_catch_up_does_not_scale_with_templates_or_days(self):
+        end = date(2024, 6, 30)
+        due = sum(len(list(due_dates(template, end))) for template in RecurringExpense.objects.all())
+        self.assertGreater(due, RECURRING_COUNT * 10)
+        # Every template catches up from its start date through June. Besides
+        # templates, already generated rows, the savepoint pair and
+        # last_generated that is the INSERTs plus six new monthly buckets,
+        # however many templates or days
+        with self.assertNumQueries(2 + 2 + insert_statements(due, 1000) + 6 * NEW_BUCKET_QUERIES + 1):
+            self.assertEqual(generate_recurring_expenses(end), due)
+
+        # A second run reads the templates and finds nothing due
+        with self.assertNumQueries(1):
+            self.assertEqual(generate_recurring_expenses(end), 0)
+
+
+class BulkSignalRollupTests(TestCase):
+    """Rollups kept up to date through expenses_bulk_created must equal a rebuild"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rollups', password='password')
+        self.template = RecurringExpense.objects.create(
+            user=self.user, title='Rent', amount=Decimal('100'), category='Subscriptions',
+            frequency='monthly', start_date=date(2024, 1, 1),
+        )
+
+    def assertRollupsMatchRebuild(self):
+        def totals():
+            return sorted(
+                MonthlyCategoryTotal.objects.filter(user=self.user).values_list('month', 'category', 'total', 'count')
+            )
+        maintained = totals()
+        rollups.rebuild([self.user])
+        self.assertEqual(maintained, totals())
+
+    def test_overlapping_generation_runs(self):
+        self.assertEqual(generate_recurring_expenses(date(2024, 3, 31), users=[self.user]), 3)
+        self.assertEqual(
+            generate_recurring_expenses(date(2024, 6, 30), start_date=date(2024, 2, 1), users=[self.user]), 3
+        )
+        self.assertRollupsMatchRebuild()
+
+    def test_rows_inserted_by_a_concurrent_run_are_not_counted(self):
+        generate_recurring_expenses(date(2024, 3, 31), users=[self.user])
+        generated_pairs = recurring._generated_pairs
+
+        def stale_read(occurrences, users):
+            existing = generated_pairs(occurrences, users)
+            if not stale_read.raced:
+                # Another run generates April right after this one read the existing pairs
+                stale_read.raced = True
+                Expense.objects.create(
+                    user=self.user, recurring_source=self.template, title='[Recurring] Rent',
+                    amount=Decimal('100'), date=date(2024, 4, 1), category='Subscriptions',
+                )
+            return existing
+        stale_read.raced = False
+
+        with mock.patch.object(recurring, '_generated_pairs', side_effect=stale_read):
+            self.assertEqual(generate_recurring_expenses(date(2024, 6, 30), users=[self.user]), 2)
+        self.assertEqual(self.template.generated_expenses.count(), 6)
+        april = MonthlyCategoryTotal.objects.get(user=self.user, month=date(2024, 4, 1), category='Subscriptions')
+        self.assertEqual((april.total, april.count), (Decimal('100'), 1))
+        self.assertRollupsMatchRebuild()
+
+
+class ImportExportQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_import_batches(self):
+        df = read_expense_file(SimpleUploadedFile('expenses.csv', expense_csv(2500, IMPORT_START)))
+        # Batches of 1000, 1000 and 500 rows, each touching March and April:
+        # two new buckets for the first batch, two updates for each later one
+        inserts = insert_statements(1000) * 2 + insert_statements(500)
+        with self.assertNumQueries(2 + inserts + 2 * NEW_BUCKET_QUERIES + 2 * 2):
+            result = import_expenses(self.user, df)
+        self.assertEqual(result.imported_count, 2500)
+
+    def test_import_view(self):
+        upload = SimpleUploadedFile('expenses.csv', expense_csv(1500, IMPORT_START))
+        inserts = insert_statements(1000) + insert_statements(500)
+        # Import as above, then one budget lookup for the alerts (there are
+        # no budgets for 2031, so no spending query)
+        with self.assertNumQueries(2 + 2 + inserts + 2 * NEW_BUCKET_QUERIES + 2 + 1):
+            self.client.post('/import/', {'file': upload})
+        self.assertEqual(Expense.objects.filter(user=self.user, title__startswith='Imported').count(), 1500)
+
+    def test_csv_export_streams_in_one_query(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/export/', {'format': 'csv'})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(content.count(b'\n'), EXPENSE_COUNT + 1)
+
+    def test_excel_and_pdf_exports(self):
+        # The PDF adds monthly and category summary queries
+        for export_format, queries in (('excel', 3), ('pdf', 5)):
+            with self.subTest(format=export_format), self.assertNumQueries(queries):
+                response = self.client.get('/export/', {'format': export_format})
+                b''.join(response.streaming_content)
+
+    def test_background_export_job(self):
+        with self.assertNumQueries(3):
+            self.client.get('/export/', {'format': 'csv', 'background': '1'})
+        # Claim (2), user, row count and total, the streamed rows, progress
+        # every PROGRESS_EVERY rows and the final save
+        with self.assertNumQueries(2 + 3 + 1 + EXPENSE_COUNT // PROGRESS_EVERY + 1):
+            run_job(claim_next_job())
+        job = Job.objects.get(user=self.user)
+        self.assertEqual(job.status, 'done')
+        with self.assertNumQueries(3):
+            self.client.get(f'/jobs/{job.id}/')
+
+    def test_background_import_job(self):
+        upload = SimpleUploadedFile('expenses.csv', expense_csv(1500, IMPORT_START))
+        with self.assertNumQueries(3):
+            self.client.post('/import/', {'file': upload, 'background': '1'})
+        inserts = insert_statements(1000) + insert_statements(500)
+        # Claim (2), total and user, the import as in test_import_view, the
+        # budget lookup for alerts and the final save
+        with self.assertNumQueries(2 + 2 + 2 + inserts + 2 * NEW_BUCKET_QUERIES + 2 + 1 + 1):
+            run_job(claim_next_job())
+        self.assertEqual(Job.objects.get(user=self.user).result['imported_count'], 1500)
+
+
+class BudgetStatusTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('spender', password='password')
+        self.march = date(2024, 3, 1)
+        upsert_budgets(self.user, [(self.march, 'Overall', Decimal('100')), (self.march, 'Food', Decimal('50'))])
+
+    def add(self, amount, category, day=date(2024, 3, 15)):
+        return Expense.objects.create(user=self.user, title='Spend', amount=Decimal(amount), date=day, category=category)
+
+    def test_totals_come_from_the_rollup_in_one_query(self):
+        self.add('30', 'Food')
+        travel = self.add('40', 'Travel')
+        self.add('500', 'Food', day=date(2024, 4, 1))
+        with self.assertNumQueries(1):
+            status = get_budget_status(self.user, date(2024, 3, 20), 'Food')
+        self.assertEqual((status.overall_total, status.category_total), (Decimal('70'), Decimal('30')))
+
+        travel.amount = Decimal('65')
+        travel.save()
+        status = get_budget_status(self.user, self.march, 'Travel')
+        self.assertEqual(
+            (status.overall_total, status.category_total, status.category_budget), (Decimal('95'), Decimal('65'), None)
+        )
+        self.assertEqual(status.overall_level, 'warning')
+
+        MonthlyCategoryTotal.objects.filter(user=self.user, month=self.march, category='Food').update(total=Decimal('999'))
+        self.assertEqual(get_budget_status(self.user, self.march).overall_total, Decimal('1064'))
+
+    def test_batch_alerts_read_the_rollup(self):
+        expenses = [self.add('45', 'Food'), self.add('60', 'Travel')]
+        with self.assertNumQueries(2):
+            alerts = check_batch_budget_alerts(self.user, expenses)
+        self.assertEqual(alerts, [
+            "March 2024: ⚠️ You're close to your Food budget limit. Remaining: $5.00",
+            "March 2024: 🚨 You've exceeded your overall monthly budget of $100.00!",
+        ])
+
+
+class BulkBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('planner', password='password')
+        self.other = User.objects.create_user('other', password='password')
+        self.march, self.april = date(2024, 3, 1), date(2024, 4, 1)
+
+    def month_budgets(self, user, month):
+        return dict(Budget.objects.filter(user=user, month=month).values_list('category', 'amount'))
+
+    def test_upsert_creates_and_updates_in_place(self):
+        Budget.objects.create(user=self.user, category='Food', amount=Decimal('100'), month=self.march)
+        written = upsert_budgets(self.user, [
+            (self.march, 'Food', Decimal('150')),
+            (self.march, 'Overall', Decimal('1000')),
+            (self.april, 'Food', Decimal('120')),
+        ])
+        self.assertEqual(written, 3)
+        self.assertEqual(self.month_budgets(self.user, self.march), {'Food': Decimal('150'), 'Overall': Decimal('1000')})
+        self.assertEqual(self.month_budgets(self.user, self.april), {'Food': Decimal('120')})
+        self.assertEqual(Budget.objects.filter(user=self.user).count(), 3)
+        self.assertTrue(Budget.objects.get(user=self.user, month=self.march, category='Overall').is_overall)
+
+    def test_copy_keeps_or_overwrites_existing_budgets(self):
+        upsert_budgets(self.user, [(self.march, 'Food', Decimal('150')), (self.march, 'Travel', Decimal('80'))])
+        upsert_budgets(self.user, [(self.april, 'Food', Decimal('90'))])
+        upsert_budgets(self.other, [(self.march, 'Food', Decimal('10'))])
+
+        self.assertEqual(copy_budgets(self.march, self.april, users=[self.user]), 1)
+        self.assertEqual(self.month_budgets(self.user, self.april), {'Food': Decimal('90'), 'Travel': Decimal('80')})
+        self.assertEqual(self.month_budgets(self.other, self.april), {})
+
+        self.assertEqual(copy_budgets(self.march, self.april, users=[self.user]), 0)
+        self.assertEqual(copy_budgets(self.march, self.april, users=[self.user], overwrite=True), 2)
+        self.assertEqual(self.month_budgets(self.user, self.april), {'Food': Decimal('150'), 'Travel': Decimal('80')})
+
+    def test_copy_does_not_count_budgets_created_concurrently(self):
+        upsert_budgets(self.user, [(self.march, 'Food', Decimal('150')), (self.march, 'Travel', Decimal('80'))])
+        uncopied = budgets._uncopied
+
+        def stale_read(rows, target):
+            missing = uncopied(rows, target)
+            if not stale_read.raced:
+                # Another request creates April's Food budget right after this read
+                stale_read.raced = True
+                Budget.objects.create(user=self.user, category='Food', amount=Decimal('95'), month=self.april)
+            return missing
+        stale_read.raced = False
+
+        with mock.patch.object(budgets, '_uncopied', side_effect=stale_read):
+            self.assertEqual(copy_budgets(self.march, self.april, users=[self.user]), 1)
+        self.assertEqual(self.month_budgets(self.user, self.april), {'Food': Decimal('95'), 'Travel': Decimal('80')})
+
+    def test_roll_forward_command(self):
+        upsert_budgets(self.user, [(self.march, 'Food', Decimal('150')), (self.march, 'Overall', Decimal('900'))])
+        upsert_budgets(self.other, [(self.march, 'Food', Decimal('10'))])
+
+        out = StringIO()
+        call_command('roll_forward_budgets', '--month', '2024-04', '--user', 'planner', stdout=out)
+        self.assertIn('Copied 2 budgets from March 2024 to April 2024.', out.getvalue())
+        self.assertEqual(self.month_budgets(self.user, self.april), {'Food': Decimal('150'), 'Overall': Decimal('900')})
+        self.assertEqual(self.month_budgets(self.other, self.april), {})
+
+        out = StringIO()
+        call_command('roll_forward_budgets', '--month', '2024-04', stdout=out)
+        self.assertIn('Copied 1 budgets', out.getvalue())
+        self.assertEqual(self.month_budgets(self.other, self.april), {'Food': Decimal('10')})
+
+        with self.assertRaisesMessage(CommandError, 'Unknown user(s): nobody'):
+            call_command('roll_forward_budgets', '--month', '2024-04', '--user', 'nobody')
+        with self.assertRaisesMessage(CommandError, '--from must differ from --month'):
+            call_command('roll_forward_budgets', '--month', '2024-04', '--from', '2024-04')
+
+
+@override_settings(
+    MIDDLEWARE=['expenses.middleware.RequestStatsMiddleware', *settings.MIDDLEWARE],
+    EXPENSES_SLOW_REQUEST_MS=0,
+)
+class RequestStatsMiddlewareTests(TestCase):
+    def setUp(self):
+        reset_request_stats()
+        self.addCleanup(reset_request_stats)
+        cache.clear()
+        self.client.force_login(User.objects.create_user('timed', password='password'))
+
+    def test_timing_header_stats_and_slow_request_log(self):
+        with self.assertLogs('expenses.middleware', 'WARNING') as logs, CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        query_count = len(queries)
+        self.assertRegex(
+            response['Server-Timing'], rf'^db;dur=\d+\.\d;desc="{query_count} queries", view;dur=\d+\.\d$'
+        )
+
+        message = logs.records[0].getMessage()
+        self.assertTrue(message.startswith('Slow request GET / (home): '), message)
+        self.assertIn(f'{query_count} queries in', message)
+        # One line per query, with its SQL as sent (parameters not interpolated)
+        self.assertEqual(len(message.splitlines()), 1 + query_count)
+        self.assertIn('FROM "django_session"', message)
+        self.assertIn('FROM "expenses_monthlycategorytotal"', message)
+
+        self.client.get('/')
+        stats = request_stats()
+        self.assertEqual(list(stats), ['home'])
+        self.assertEqual(stats['home']['requests'], 2)
+        self.assertEqual(stats['home']['queries_max'], query_count)
+        self.assertEqual(stats['home']['response_bytes_avg'], len(response.content))
+
+
+class ImportValidationTests(SimpleTestCase):
+    def test_mixed_utc_offsets_are_validated_per_row(self):
+        content = '\n'.join([
+            'Date,Title,Amount,Category,Notes',
+            '2024-03-01T23:30:00-05:00,Taxi,12.50,Travel,',
+            '2024-03-02T08:00:00+01:00,Lunch,9.00,Food,',
+            '2024-03-03,Books,20,Other,',
+            'someday,Broken,5,Food,',
+        ]).encode()
+        df = read_expense_file(SimpleUploadedFile('expenses.csv', content))
+        valid, errors = validate_rows(normalize_columns(df))
+        self.assertEqual(list(valid['date']), [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 3)])
+        self.assertEqual(errors, ['Row 5: Invalid date format'])
+
+
+class ApiQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_list_pages(self):
+        with self.assertNumQueries(1):
+            response = self.api.get('/api/expenses/', {'page_size': 200})
+        with self.assertNumQueries(1):
+            self.api.get('/api/expenses/', {'cursor': response.data['next_cursor'], 'fields': 'id,amount'})
+        for resource in ('budgets', 'recurring'):
+            with self.subTest(resource=resource), self.assertNumQueries(1):
+                self.api.get(f'/api/{resource}/', {'page_size': 200})
+
+    def test_bulk_create_and_delete(self):
+        rows = [
+            {'title': f'Bulk {i}', 'amount': '5.00', 'date': f'2031-01-{i % 28 + 1:02d}', 'category': 'Food'}
+            for i in range(MAX_BULK_SIZE)
+        ]
+        # One new bucket and a budget lookup for the alerts
+        with self.assertNumQueries(2 + insert_statements(MAX_BULK_SIZE, 500) + NEW_BUCKET_QUERIES + 1):
+            response = self.api.post('/api/expenses/bulk/', rows, format='json')
+        ids = [row['id'] for row in response.data['results']]
+
+        # Rows are collected once and deleted 100 ids per statement; the
+        # rollup is updated once per bucket, not once per row
+        with self.assertNumQueries(2 + 1 + math.ceil(MAX_BULK_SIZE / 100) + 1):
+            response = self.api.post('/api/expenses/bulk-delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.data['deleted'], MAX_BULK_SIZE)
+
+    def test_aggregate(self):
+        start = month_start(self.today - timedelta(days=HISTORY_DAYS))
+        for granularity in ('day', 'week', 'month', 'quarter', 'year'):
+            with self.subTest(granularity=granularity), self.assertNumQueries(1):
+                self.api.get('/api/expenses/aggregate/', {
+                    'start': start, 'end': self.today, 'granularity': granularity, 'group_by': 'category',
+                })
+
+
+class OccurrenceTests(SimpleTestCase):
+    """RecurringExpense.occurrences checked against the per-day
+    should_generate_expense rule over seeded random templates and windows"""
+
+    SEED = 2025
+    CASES = 2000
+
+    def random_template(self, rng):
+        start = date(2023, 1, 1) + timedelta(days=rng.randrange(3 * 365))
+        if rng.random() < 0.3:
+            # Month-end start days are where the monthly rule needs clamping
+            start = start.replace(day=28) + timedelta(days=rng.randrange(4))
+        end = rng.choice([None, start + timedelta(days=rng.randint(-30, 900))])
+        return RecurringExpense(
+            title='Random', amount=Decimal('1'), start_date=start, end_date=end,
+            frequency=rng.choice(FREQUENCIES), is_active=rng.random() < 0.9,
+        )
+
+    def test_matches_per_day_rule(self):
+        rng = random.Random(self.SEED)
+        for _ in range(self.CASES):
+            template = self.random_template(rng)
+            start = date(2022, 11, 1) + timedelta(days=rng.randrange(4 * 365))
+            end = start + timedelta(days=rng.randint(-3, 500))
+            expected = [
+                start + timedelta(days=offset)
+                for offset in range((end - start).days + 1)
+                if template.should_generate_expense(start + timedelta(days=offset))
+            ]
+            self.assertEqual(
+                template.occurrences(start, end), expected,
+                f'{template.frequency} from {template.start_date} to {template.end_date} '
+                f'(active={template.is_active}) over {start}..{end}',
+            )
+
+    def test_monthly_clamps_to_month_end(self):
+        template = RecurringExpense(start_date=date(2024, 1, 31), frequency='monthly')
+        self.assertEqual(template.occurrences(date(2024, 1, 1), date(2024, 5, 31)), [
+            date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31),
+        ])
+        template = RecurringExpense(start_date=date(2023, 1, 29), frequency='monthly')
+        self.assertEqual(template.occurrences(date(2023, 2, 1), date(2023, 3, 31)), [
+            date(2023, 2, 28), date(2023, 3, 29),
+        ])
+
+    def test_monthly_occurs_once_every_month(self):
+        rng = random.Random(self.SEED)
+        for _ in range(200):
+            start = date(2023, 1, 1) + timedelta(days=rng.randrange(365))
+            template = RecurringExpense(start_date=start, frequency='monthly')
+            end = rollups.add_months(month_start(start), 24) - timedelta(days=1)
+            self.assertEqual(len(template.occurrences(start, end)), 24, start)
+
+
+class OccurrenceQuerySetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('occurrences', password='password')
+        RecurringExpense.objects.bulk_create([
+            RecurringExpense(
+                user=self.user, title=f'Template {i}', amount=Decimal('5'), category='Subscriptions',
+                frequency=FREQUENCIES[i % len(FREQUENCIES)], start_date=date(2024, 1, 25) + timedelta(days=i),
+                end_date=date(2024, 3, 10) if i % 4 == 0 else None, is_active=i % 5 != 0,
+            )
+            for i in range(12)
+        ])
+
+    def test_bulk_occurrences_reuse_the_evaluated_queryset(self):
+        start, end = date(2024, 2, 1), date(2024, 4, 30)
+        templates = RecurringExpense.objects.filter(user=self.user).overlapping(start, end)
+        self.assertTrue(all(template.is_active for template in templates))
+        with self.assertNumQueries(0):
+            occurrences = templates.occurrences(start, end)
+        expected = sorted(
+            ((template, day) for template in templates for day in template.occurrences(start, end)),
+            key=lambda item: (item[1], item[0].pk),
+        )
+        self.assertEqual(occurrences, expected)
+        self.assertEqual(
+            {template.pk for template in templates},
+            {pk for pk, in RecurringExpense.objects.filter(user=self.user, is_active=True).values_list('pk')},
+        )
+
+    def test_catch_up_generates_on_clamped_month_ends(self):
+        template = RecurringExpense.objects.create(
+            user=self.user, title='Month end', amount=Decimal('100'), frequency='monthly', start_date=date(2024, 1, 31),
+        )
+        generate_recurring_expenses(date(2024, 4, 30), users=[self.user])
+        self.assertEqual(
+            list(template.generated_expenses.order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+
+
+class CacheStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.addCleanup(reset_cache_stats)
+        self.user = User.objects.create_user('cached', password='password')
+
+    def test_hits_misses_and_invalidations_are_counted(self):
+        day = date(2024, 3, 10)
+
+        def status():
+            return get_dashboard_status(self.user, day, lambda: get_budget_status(self.user, day))
+
+        status()
+        status()
+        Expense.objects.create(user=self.user, title='Lunch', amount=Decimal('12'), date=day, category='Food')
+        self.assertEqual(status().overall_total, Decimal('12'))
+
+        stats = cache_stats()
+        self.assertEqual((stats['dashboard_hits'], stats['dashboard_misses']), (1, 2))
+        self.assertEqual(stats['dashboard_hit_rate'], 0.333)
+        self.assertGreaterEqual(stats['invalidations_total'], 1)
+        self.assertIsNone(stats['reports_hit_rate'])
+
+        reset_cache_stats()
+        self.assertEqual(cache_stats(), {'dashboard_hit_rate': None, 'reports_hit_rate': None, 'analytics_hit_rate': None})
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('analyst', password='password')
+        self.day = date(2024, 3, 10)
+        rows = [(date(2024, 1, 5), 'Food', 100), (date(2024, 2, 20), 'Food', 150), (date(2024, 2, 25), 'Travel', 50)]
+        rows += [(date(2024, 3, day), 'Food', 10) for day in range(1, 11)]
+        rows += [(date(2024, 3, 8), 'Travel', 30)]
+        Expense.objects.bulk_create([
+            Expense(user=self.user, title='Spend', amount=Decimal(amount), date=day, category=category)
+            for day, category, amount in rows
+        ])
+        Budget.objects.bulk_create([
+            Budget(user=self.user, category='Overall', amount=Decimal('350'), month=date(2024, 3, 1), is_overall=True),
+            Budget(user=self.user, category='Food', amount=Decimal('300'), month=date(2024, 3, 1)),
+        ])
+
+    def test_trends_and_forecast(self):
+        analytics = month_analytics(self.user, self.day)
+        self.assertEqual(
+            [(row['month'], row['total'], row['change'], row['change_pct']) for row in analytics['monthly'][-4:]],
+            [
+                (date(2023, 12, 1), 0.0, 0.0, None),
+                (date(2024, 1, 1), 100.0, 100.0, None),
+                (date(2024, 2, 1), 200.0, 100.0, 100.0),
+                (date(2024, 3, 1), 130.0, -70.0, -35.0),
+            ],
+        )
+        # Mar 4..10: seven days of food plus the travel on the 8th
+        self.assertEqual(json.loads(analytics['rolling_7'])[-1], 14.29)
+
+        # Feb 10..Mar 10 averages 330 / 30 a day over the 21 days left
+        self.assertEqual(analytics['daily_average'], 11.0)
+        self.assertEqual(analytics['forecast'], 361.0)
+        self.assertEqual(analytics['forecast_variance'], -11.0)
+        self.assertEqual(analytics['forecast_level'], 'exceeded')
+
+        food, travel = analytics['categories']
+        self.assertEqual((food['category'], food['month_to_date'], food['run_rate']), ('Food', 100.0, 258.33))
+        self.assertEqual((food['forecast'], food['forecast_level']), (275.0, 'warning'))
+        self.assertEqual((travel['run_rate'], travel['forecast'], travel['forecast_level']), (82.67, 86.0, None))
+
+    def test_cached_value_from_an_earlier_day_is_recomputed(self):
+        computed = []
+
+        def compute(day):
+            computed.append(day)
+            return month_analytics(self.user, day)
+
+        first = get_month_analytics(self.user, self.day, lambda: compute(self.day))
+        self.assertEqual(get_month_analytics(self.user, self.day, lambda: compute(self.day)), first)
+        later = self.day + timedelta(days=1)
+        self.assertEqual(get_month_analytics(self.user, later, lambda: compute(later))['as_of'], later)
+        self.assertEqual(computed, [self.day, later])
+
+
+class ProjectionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('projector', password='password')
+        RecurringExpense.objects.bulk_create([
+            RecurringExpense(
+                user=self.user, title='Coffee', amount=Decimal('3.50'), category='Food',
+                frequency='daily', start_date=date(2024, 1, 20), end_date=date(2024, 3, 10),
+            ),
+            RecurringExpense(
+                user=self.user, title='Cleaner', amount=Decimal('40'), category='Other',
+                frequency='weekly', start_date=date(2024, 1, 3),
+            ),
+            RecurringExpense(
+                user=self.user, title='Rent', amount=Decimal('900'), category='Other',
+                frequency='monthly', start_date=date(2023, 12, 31),
+            ),
+            RecurringExpense(
+                user=self.user, title='Paused', amount=Decimal('99'), category='Food',
+                frequency='daily', start_date=date(2024, 1, 1), is_active=False,
+            ),
+        ])
+        Budget.objects.bulk_create([
+            Budget(user=self.user, category='Overall', amount=Decimal('1000'), month=date(2024, 2, 1), is_overall=True),
+            Budget(user=self.user, category='Overall', amount=Decimal('1200'), month=date(2024, 3, 1), is_overall=True),
+            Budget(user=self.user, category='Food', amount=Decimal('10'), month=date(2024, 3, 1)),
+        ])
+
+    def test_totals_match_the_occurrences(self):
+        start, end = date(2024, 1, 15), date(2024, 4, 10)
+        projection = project_recurring(self.user, start, end)
+        occurrences = RecurringExpense.objects.filter(user=self.user).overlapping(start, end).occurrences(start, end)
+        self.assertNotIn('Paused', {template.title for template, _ in occurrences})
+
+        per_day = {start + timedelta(days=offset): Decimal('0') for offset in range((end - start).days + 1)}
+        per_month = {}
+        for template, day in occurrences:
+            per_day[day] += template.amount
+            categories = per_month.setdefault(month_start(day), {})
+            categories[template.category] = categories.get(template.category, Decimal('0')) + template.amount
+
+        self.assertEqual(projection['days'], sorted(per_day.items()))
+        self.assertEqual(projection['total'], sum(per_day.values()))
+        self.assertEqual(
+            [(month['month'], month['categories']) for month in projection['months']],
+            [(month, sorted(categories.items())) for month, categories in sorted(per_month.items())],
+        )
+        # February: 29 coffees, four Wednesday cleaner visits and rent on the 29th
+        february = projection['months'][1]
+        self.assertEqual(february['total'], Decimal('3.50') * 29 + Decimal('40') * 4 + Decimal('900'))
+
+    def test_months_are_compared_with_their_overall_budget(self):
+        projection = project_recurring(self.user, date(2024, 1, 15), date(2024, 4, 10))
+        months = {month['month']: month for month in projection['months']}
+        self.assertEqual(list(months), [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)])
+
+        for month in months.values():
+            self.assertEqual(month['total'], sum((total for _, total in month['categories']), Decimal('0')))
+        self.assertEqual(
+            [(month['budget'], month['remaining'], month['level']) for month in months.values()],
+            [
+                (None, None, None),
+                (Decimal('1000'), Decimal('1000') - months[date(2024, 2, 1)]['total'], 'exceeded'),
+                (Decimal('1200'), Decimal('1200') - months[date(2024, 3, 1)]['total'], 'warning'),
+                (None, None, None),
+            ],
+        )
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('searcher', password='password')
+        self.other = User.objects.create_user('other', password='password')
+
+    def add(self, title, day, notes=None, category='Other', user=None):
+        return Expense.objects.create(
+            user=user or self.user, title=title, amount=Decimal('10'), date=day, category=category, notes=notes,
+        )
+
+    def titles(self, query, **filters):
+        return [expense.title for expense in search_expenses(self.user, query, **filters)]
+
+    def test_ranks_every_term_and_prefix_matches(self):
+        self.add('Groceries', date(2024, 3, 10), notes='Paid cash back to the driver at the supermarket near the taxi stand')
+        self.add('Taxi', date(2024, 3, 1), notes='Taxi home from the airport', category='Travel')
+        self.add('Airport parking', date(2024, 3, 5), category='Travel')
+        self.add('Taxi', date(2024, 3, 2), user=self.other)
+
+        self.assertEqual(self.titles('taxi'), ['Taxi', 'Groceries'])
+        self.assertEqual(self.titles('TAX'), ['Taxi', 'Groceries'])
+        self.assertEqual(self.titles('taxi airport'), ['Taxi'])
+        self.assertEqual(self.titles('...'), [])
+
+    def test_ties_are_newest_first_and_filters_apply(self):
+        for day in (date(2024, 1, 5), date(2024, 3, 5), date(2024, 2, 5)):
+            self.add('Parking', day, category='Travel')
+        self.add('Parking', date(2024, 4, 5), category='Other')
+
+        found = search_expenses(self.user, 'parking', category='Travel')
+        self.assertEqual([expense.date for expense in found], [date(2024, 3, 5), date(2024, 2, 5), date(2024, 1, 5)])
+        found = search_expenses(self.user, 'parking', start=date(2024, 2, 1), end=date(2024, 3, 31))
+        self.assertEqual([expense.date for expense in found], [date(2024, 3, 5), date(2024, 2, 5)])
+        self.assertEqual(len(search_expenses(self.user, 'parking', limit=2)), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        expense = self.add('Dinner', date(2024, 3, 1), notes='birthday')
+        self.assertEqual(self.titles('birthday'), ['Dinner'])
+
+        expense.notes = 'anniversary'
+        expense.save()
+        self.assertEqual(self.titles('birthday'), [])
+        self.assertEqual(self.titles('anniversary'), ['Dinner'])
+
+        Expense.objects.filter(pk=expense.pk).update(title='Supper')
+        self.assertEqual(self.titles('dinner'), [])
+        self.assertEqual(self.titles('supper anniversary'), ['Supper'])
+
+        expense.delete()
+        self.assertEqual(self.titles('anniversary'), [])
@@ -1,27 +1,47 @@
-from django.urls import path
-from . import views
+from django.conf import settings
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from . import api_views, async_views, import_export_views, views
+
+router = DefaultRouter()
+router.register('expenses', api_views.ExpenseViewSet, basename='api-expense')
+router.register('budgets', api_views.BudgetViewSet, basename='api-budget')
+router.register('recurring', api_views.RecurringExpenseViewSet, basename='api-recurring')
+
+# Read-heavy pages have native async implementations for ASGI deployments
+read_views = async_views if settings.EXPENSES_ASYNC_VIEWS else views
 
 urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('', views.home_view, name='home'),
+    path('', read_views.home_view, name='home'),
+    path('expenses/page/', views.expenses_page_view, name='expenses_page'),
+    path('search/', views.search_view, name='search_expenses'),
     path('add/', views.add_expense_view, name='add_expense'),
     path('delete/<int:expense_id>/', views.delete_expense_view, name='delete_expense'),
-    path('day/', views.expenses_day_view, name='expenses_day'),
-    path('week/', views.expenses_week_view, name='expenses_week'),
-    path('month/', views.expenses_month_view, name='expenses_month'),
-    path('reports/', views.monthly_reports_view, name='monthly_reports'),
+    path('day/', read_views.expenses_day_view, name='expenses_day'),
+    path('week/', read_views.expenses_week_view, name='expenses_week'),
+    path('month/', read_views.expenses_month_view, name='expenses_month'),
+    path('reports/', read_views.monthly_reports_view, name='monthly_reports'),
     path('budgets/', views.budgets_view, name='budgets'),
     path('budgets/add/', views.add_budget_view, name='add_budget'),
+    path('budgets/bulk/', views.bulk_budgets_view, name='bulk_budgets'),
     path('budgets/edit/<int:budget_id>/', views.edit_budget_view, name='edit_budget'),
     path('budgets/delete/<int:budget_id>/', views.delete_budget_view, name='delete_budget'),
     path('recurring/', views.recurring_expenses_view, name='recurring_expenses'),
     path('recurring/add/', views.add_recurring_expense_view, name='add_recurring_expense'),
     path('recurring/edit/<int:recurring_id>/', views.edit_recurring_expense_view, name='edit_recurring_expense'),
     path('recurring/delete/<int:recurring_id>/', views.delete_recurring_expense_view, name='delete_recurring_expense'),
+    path('recurring/projection/', views.recurring_projection_view, name='recurring_projection'),
     path('recurring/generate/', views.generate_recurring_expenses_view, name='generate_recurring_expenses'),
-    path('export/', views.export_expenses_view, name='export_expenses'),
-    path('import/', views.import_expenses_view, name='import_expenses'),
-    path('import-export/', views.import_export_view, name='import_export'),
+    path('export/', import_export_views.export_expenses_view, name='export_expenses'),
+    path('import/', import_export_views.import_expenses_view, name='import_expenses'),
+    path('import-export/', import_export_views.import_export_view, name='import_export'),
+    path('jobs/', import_export_views.jobs_view, name='jobs'),
+    path('jobs/<int:job_id>/', import_export_views.job_status_view, name='job_status'),
+    path('jobs/<int:job_id>/download/', import_export_views.job_download_view, name='job_download'),
+    path('stats/cache/', views.cache_stats_view, name='cache_stats'),
+    path('stats/requests/', views.request_stats_view, name='request_stats'),
+    path('api/', include(router.urls)),
 ]
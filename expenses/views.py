@@ -1,20 +1,24 @@
 # expenses/views.py
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.db.models import Sum, Q
-from datetime import datetime, date
-from .forms import SignUpForm, LoginForm, ExpenseForm, BudgetForm, RecurringExpenseForm
+from datetime import datetime, date, timedelta
+from .forms import SignUpForm, LoginForm, ExpenseForm, BudgetForm, BudgetGridForm, RecurringExpenseForm, ExpenseSearchForm
 from .models import Expense, Budget, RecurringExpense
-import csv
-import pandas as pd
-from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from io import BytesIO
+from . import rollups
+from .budgets import check_budget_alerts, copy_budgets, get_budget_status, upsert_budgets
+from .analytics import month_analytics
+from .cache import cache_stats, get_dashboard_status, get_month_analytics, get_report_payload
+from .middleware import request_stats
+from .reports import report_payload
+from .pagination import keyset_page, parse_page_size
+from .projections import chart_data, project_recurring, upcoming_charges
+from .recurring import generate_recurring_expenses
+from .search import search_expenses
+from django.http import JsonResponse
 
 def signup_view(request):
     if request.method == 'POST':
@@ -44,47 +48,62 @@ def logout_view(request):
 
 @login_required
 def home_view(request):
-    from django.db.models import Sum
-    from django.db.models.functions import TruncMonth
-    from datetime import datetime
-
-    expenses = Expense.objects.filter(user=request.user).order_by('-date')
-
-    # Calculate monthly total for current month
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    monthly_total = Expense.objects.filter(
-        user=request.user,
-        date__year=current_year,
-        date__month=current_month
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    # Get budget information for current month
-    current_month_date = date(current_year, current_month, 1)
-    overall_budget = Budget.objects.filter(
-        user=request.user,
-        category='Overall',
-        month=current_month_date
-    ).first()
-
-    budget_remaining = None
-    budget_alert = None
-    if overall_budget:
-        budget_remaining = overall_budget.amount - monthly_total
-        if monthly_total >= overall_budget.amount:
-            budget_alert = "exceeded"
-        elif monthly_total >= overall_budget.amount * 0.9:
-            budget_alert = "warning"
+    cursor = request.GET.get('cursor')
+    page = keyset_page(Expense.objects.filter(user=request.user), cursor)
+
+    # Budget and spending for the current month in one query, cached until
+    # the user's expenses or budgets for the month change
+    today = date.today()
+    budget_status = get_dashboard_status(request.user, today, lambda: get_budget_status(request.user, today))
 
     return render(request, 'expenses/home.html', {
-        'expenses': expenses,
-        'monthly_total': monthly_total,
+        'expenses': page.items,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
+        'monthly_total': budget_status.overall_total,
         'current_month': datetime.now().strftime('%B %Y'),
-        'overall_budget': overall_budget,
-        'budget_remaining': budget_remaining,
-        'budget_alert': budget_alert,
+        'overall_budget': budget_status.overall_budget,
+        'budget_remaining': budget_status.overall_remaining,
+        'budget_alert': budget_status.overall_level,
+    })
+
+@login_required
+def expenses_page_view(request):
+    """Return one keyset page of the user's expenses as JSON for "load more" clients"""
+    page = keyset_page(
+        Expense.objects.filter(user=request.user),
+        request.GET.get('cursor'),
+        parse_page_size(request.GET.get('page_size')),
+    )
+    return JsonResponse({
+        'expenses': [
+            {
+                'id': expense.id,
+                'title': expense.title,
+                'amount': str(expense.amount),
+                'date': expense.date.isoformat(),
+                'category': expense.category,
+                'notes': expense.notes,
+            }
+            for expense in page.items
+        ],
+        'next_cursor': page.next_cursor,
     })
 
+@login_required
+def search_view(request):
+    form = ExpenseSearchForm(request.GET or None)
+    results = None
+    if form.is_valid():
+        results = search_expenses(
+            request.user,
+            form.cleaned_data['q'],
+            form.cleaned_data['category'],
+            form.cleaned_data['start'],
+            form.cleaned_data['end'],
+        )
+    return render(request, 'expenses/search.html', {'form': form, 'results': results})
+
 @login_required
 def add_expense_view(request):
     if request.method == 'POST':
@@ -138,45 +157,61 @@ def expenses_month_view(request):
 
 @login_required
 def monthly_reports_view(request):
-    from django.db.models import Sum
-    from django.db.models.functions import TruncMonth
-    import json
-
-    # Get expenses for the current user
-    expenses = Expense.objects.filter(user=request.user)
-
-    # Monthly totals
-    monthly_totals = expenses.annotate(month=TruncMonth('date')).values('month').annotate(total=Sum('amount')).order_by('month')
-
-    # Category totals
-    category_totals = expenses.values('category').annotate(total=Sum('amount')).order_by('-total')
+    today = date.today()
+    context = get_report_payload(request.user, lambda: report_payload(request.user))
+    analytics = get_month_analytics(request.user, today, lambda: month_analytics(request.user, today))
+    return render(request, 'expenses/monthly_reports.html', {**context, 'analytics': analytics})
 
-    # Get budgets for comparison
-    budgets = Budget.objects.filter(user=request.user, category='Overall').order_by('-month')
 
-    # Prepare data for charts
-    monthly_labels = [item['month'].strftime('%B %Y') for item in monthly_totals]
-    monthly_data = [float(item['total']) for item in monthly_totals]
+@login_required
+def budgets_view(request):
+    budgets = Budget.objects.filter(user=request.user).order_by('-month', 'category')
+    return render(request, 'expenses/budgets.html', {'budgets': budgets})
 
-    category_labels = [item['category'] for item in category_totals]
-    category_data = [float(item['total']) for item in category_totals]
 
-    context = {
-        'monthly_labels': json.dumps(monthly_labels),
-        'monthly_data': json.dumps(monthly_data),
-        'category_labels': json.dumps(category_labels),
-        'category_data': json.dumps(category_data),
-        'monthly_totals': monthly_totals,
-        'category_totals': category_totals,
-        'budgets': budgets,
-    }
-    return render(request, 'expenses/monthly_reports.html', context)
+# Months shown at once by the bulk budget editor
+BUDGET_GRID_MONTHS = 12
+MAX_BUDGET_GRID_MONTHS = 24
 
 
 @login_required
-def budgets_view(request):
-    budgets = Budget.objects.filter(user=request.user).order_by('-month', 'category')
-    return render(request, 'expenses/budgets.html', {'budgets': budgets})
+def bulk_budgets_view(request):
+    """Edit a month x category grid of budgets, saved in a single upsert"""
+    try:
+        start = datetime.strptime(request.GET.get('start', ''), '%Y-%m').date()
+    except ValueError:
+        start = rollups.month_start(date.today())
+    try:
+        count = max(1, min(int(request.GET.get('months', BUDGET_GRID_MONTHS)), MAX_BUDGET_GRID_MONTHS))
+    except ValueError:
+        count = BUDGET_GRID_MONTHS
+    months = [rollups.add_months(start, offset) for offset in range(count)]
+
+    if request.method == 'POST' and request.POST.get('action') == 'roll_forward':
+        written = copy_budgets(rollups.add_months(start, -1), start, users=[request.user])
+        messages.success(request, f"Copied {written} budgets from {rollups.add_months(start, -1).strftime('%B %Y')}.")
+        return redirect(f"{request.path}?start={start.strftime('%Y-%m')}&months={count}")
+
+    existing = Budget.objects.filter(user=request.user, month__gte=months[0], month__lte=months[-1])
+    initial = {
+        BudgetGridForm.field_name(month, category): amount
+        for month, category, amount in existing.values_list('month', 'category', 'amount')
+    }
+    if request.method == 'POST':
+        form = BudgetGridForm(request.POST, months=months, initial=initial)
+        if form.is_valid():
+            written = upsert_budgets(request.user, form.changed_cells())
+            messages.success(request, f'Saved {written} budgets.')
+            return redirect('budgets')
+    else:
+        form = BudgetGridForm(months=months, initial=initial)
+    return render(request, 'expenses/bulk_budgets.html', {
+        'form': form,
+        'start': start,
+        'months': count,
+        'previous_start': rollups.add_months(start, -count),
+        'next_start': rollups.add_months(start, count),
+    })
 
 
 @login_required
@@ -226,6 +261,31 @@ def recurring_expenses_view(request):
     return render(request, 'expenses/recurring_expenses.html', {'recurring_expenses': recurring_expenses})
 
 
+# Months covered by the recurring projection page
+PROJECTION_MONTHS = 12
+MAX_PROJECTION_MONTHS = 24
+# Days of individual upcoming charges listed under the projection
+UPCOMING_DAYS = 30
+
+
+@login_required
+def recurring_projection_view(request):
+    """Projected recurring charges per month and day, without generating expenses"""
+    try:
+        count = max(1, min(int(request.GET.get('months', PROJECTION_MONTHS)), MAX_PROJECTION_MONTHS))
+    except ValueError:
+        count = PROJECTION_MONTHS
+    today = date.today()
+    end = rollups.add_months(rollups.month_start(today), count) - timedelta(days=1)
+    projection = project_recurring(request.user, today, end)
+    return render(request, 'expenses/recurring_projection.html', {
+        'projection': projection,
+        'months': count,
+        'upcoming': upcoming_charges(projection['templates'], today, today + timedelta(days=UPCOMING_DAYS - 1)),
+        **chart_data(projection),
+    })
+
+
 @login_required
 def add_recurring_expense_view(request):
     if request.method == 'POST':
@@ -275,272 +335,20 @@ def generate_recurring_expenses_view(request):
 
 def generate_recurring_expenses_for_date(user, target_date):
     """Generate expenses from active recurring templates for a specific date"""
-    recurring_expenses = RecurringExpense.objects.filter(user=user, is_active=True)
-    generated_count = 0
-
-    for recurring in recurring_expenses:
-        if recurring.should_generate_expense(target_date):
-            # Check if expense already exists for this recurring expense on this date
-            existing_expense = Expense.objects.filter(
-                user=user,
-                title=f"[Recurring] {recurring.title}",
-                date=target_date,
-                category=recurring.category,
-                amount=recurring.amount
-            ).exists()
-
-            if not existing_expense:
-                # Create the expense
-                Expense.objects.create(
-                    user=user,
-                    title=f"[Recurring] {recurring.title}",
-                    amount=recurring.amount,
-                    date=target_date,
-                    category=recurring.category,
-                    notes=f"Auto-generated from recurring expense. {recurring.notes or ''}"
-                )
-                generated_count += 1
-
-                # Update last_generated
-                recurring.last_generated = target_date
-                recurring.save()
-
-    return generated_count
-
-
-@login_required
-def export_expenses_view(request):
-    """Export expenses to CSV, Excel, or PDF"""
-    export_format = request.GET.get('format', 'csv')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-
-    expenses = Expense.objects.filter(user=request.user).order_by('-date')
-
-    if start_date:
-        expenses = expenses.filter(date__gte=start_date)
-    if end_date:
-        expenses = expenses.filter(date__lte=end_date)
-
-    if export_format == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="expenses.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Title', 'Amount', 'Category', 'Notes'])
-
-        for expense in expenses:
-            writer.writerow([
-                expense.date.strftime('%Y-%m-%d'),
-                expense.title,
-                float(expense.amount),
-                expense.category,
-                expense.notes or ''
-            ])
-
-        return response
-
-    elif export_format == 'excel':
-        df = pd.DataFrame(list(expenses.values('date', 'title', 'amount', 'category', 'notes')))
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-        df['amount'] = df['amount'].astype(float)
-
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename="expenses.xlsx"'
-
-        with pd.ExcelWriter(response, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Expenses', index=False)
-
-        return response
-
-    elif export_format == 'pdf':
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="expenses.pdf"'
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-
-        # Title
-        title = Paragraph("Expense Report", styles['Title'])
-        elements = [title]
-
-        # Table data
-        data = [['Date', 'Title', 'Amount', 'Category', 'Notes']]
-        for expense in expenses:
-            data.append([
-                expense.date.strftime('%Y-%m-%d'),
-                expense.title,
-                f"${float(expense.amount):.2f}",
-                expense.category,
-                expense.notes or ''
-            ])
-
-        # Create table
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), '#f0f0f0'),
-            ('TEXTCOLOR', (0, 0), (-1, 0), '#000000'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), '#ffffff'),
-            ('GRID', (0, 0), (-1, -1), 1, '#000000'),
-        ]))
-
-        elements.append(table)
-        doc.build(elements)
-
-        pdf = buffer.getvalue()
-        buffer.close()
-        response.write(pdf)
-        return response
-
-    return redirect('home')
+    return generate_recurring_expenses(target_date, start_date=target_date, users=[user])
 
 
-@login_required
-def import_expenses_view(request):
-    """Import expenses from CSV or Excel file"""
-    if request.method == 'POST' and request.FILES.get('file'):
-        uploaded_file = request.FILES['file']
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-
-        try:
-            if file_extension == 'csv':
-                df = pd.read_csv(uploaded_file)
-            elif file_extension in ['xlsx', 'xls']:
-                df = pd.read_excel(uploaded_file)
-            else:
-                messages.error(request, 'Unsupported file format. Please upload CSV or Excel file.')
-                return redirect('import_export')
-
-            # Process the dataframe
-            imported_count = 0
-            errors = []
-
-            for index, row in df.iterrows():
-                try:
-                    # Map columns (case insensitive)
-                    date_str = str(row.get('date', row.get('Date', ''))).strip()
-                    title = str(row.get('title', row.get('Title', ''))).strip()
-                    amount_str = str(row.get('amount', row.get('Amount', ''))).strip()
-                    category = str(row.get('category', row.get('Category', ''))).strip()
-                    notes = str(row.get('notes', row.get('Notes', ''))).strip()
-
-                    # Validate required fields
-                    if not date_str or not title or not amount_str:
-                        errors.append(f"Row {index + 2}: Missing required fields (date, title, amount)")
-                        continue
-
-                    # Parse date
-                    try:
-                        expense_date = pd.to_datetime(date_str).date()
-                    except:
-                        errors.append(f"Row {index + 2}: Invalid date format")
-                        continue
-
-                    # Parse amount
-                    try:
-                        amount = float(amount_str.replace('$', '').replace(',', ''))
-                    except:
-                        errors.append(f"Row {index + 2}: Invalid amount format")
-                        continue
-
-                    # Validate category
-                    valid_categories = [choice[0] for choice in Expense.CATEGORY_CHOICES]
-                    if category not in valid_categories:
-                        category = 'Other'  # Default to Other if invalid
-
-                    # Create expense
-                    Expense.objects.create(
-                        user=request.user,
-                        date=expense_date,
-                        title=title,
-                        amount=amount,
-                        category=category,
-                        notes=notes if notes else None
-                    )
-                    imported_count += 1
-
-                except Exception as e:
-                    errors.append(f"Row {index + 2}: {str(e)}")
-
-            if imported_count > 0:
-                messages.success(request, f'Successfully imported {imported_count} expenses.')
-
-            if errors:
-                for error in errors[:5]:  # Show first 5 errors
-                    messages.warning(request, error)
-                if len(errors) > 5:
-                    messages.warning(request, f'... and {len(errors) - 5} more errors.')
-
-        except Exception as e:
-            messages.error(request, f'Error processing file: {str(e)}')
-
-    return redirect('import_export')
+@staff_member_required
+def cache_stats_view(request):
+    """Dashboard/report cache hit and miss counters for this process"""
+    return JsonResponse(cache_stats())
 
 
-@login_required
-def import_export_view(request):
-    """View for import/export page"""
-    return render(request, 'expenses/import_export.html')
-
-
-def check_budget_alerts(user, category, amount, expense_date):
-    """Check if adding this expense triggers any budget alerts"""
-    alerts = []
-
-    # Get current month
-    current_month = date(expense_date.year, expense_date.month, 1)
-
-    # Check category-specific budget
-    if category != 'Overall':
-        category_budget = Budget.objects.filter(
-            user=user,
-            category=category,
-            month=current_month
-        ).first()
-
-        if category_budget:
-            # Calculate current spending in this category for the month
-            current_spending = Expense.objects.filter(
-                user=user,
-                category=category,
-                date__year=expense_date.year,
-                date__month=expense_date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-
-            new_total = current_spending + amount
-            remaining = category_budget.amount - new_total
-
-            if new_total >= category_budget.amount:
-                alerts.append(f"⚠️ You've exceeded your {category} budget of ${category_budget.amount:.2f}!")
-            elif new_total >= category_budget.amount * 0.9:
-                alerts.append(f"⚠️ You're close to your {category} budget limit. Remaining: ${remaining:.2f}")
-
-    # Check overall budget
-    overall_budget = Budget.objects.filter(
-        user=user,
-        category='Overall',
-        month=current_month
-    ).first()
-
-    if overall_budget:
-        # Calculate total spending for the month
-        total_spending = Expense.objects.filter(
-            user=user,
-            date__year=expense_date.year,
-            date__month=expense_date.month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-
-        new_total = total_spending + amount
-        remaining = overall_budget.amount - new_total
-
-        if new_total >= overall_budget.amount:
-            alerts.append(f"🚨 You've exceeded your overall monthly budget of ${overall_budget.amount:.2f}!")
-        elif new_total >= overall_budget.amount * 0.9:
-            alerts.append(f"⚠️ You're approaching your overall budget limit. Remaining: ${remaining:.2f}")
-
-    return alerts
+@staff_member_required
+def request_stats_view(request):
+    """Rolling per-view query and timing percentiles (with EXPENSES_REQUEST_STATS=1) and cache counters"""
+    return JsonResponse({
+        'enabled': settings.EXPENSES_REQUEST_STATS,
+        'requests': request_stats(),
+        'cache': cache_stats(),
+    })